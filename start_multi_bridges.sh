@@ -18,7 +18,10 @@ start_bridge_for_account() {
     
     # Starte Bridge mit separater Konfiguration
     cd "$BRIDGE_DIR"
-    PORT=$port ACCOUNT_ID=$account_id AUTH_DIR="auth_info_$account_id" node whatsapp-bridge-server.js &
+    # Zustellbestätigungen gehen an den Multi-User MCP Server (/receipts)
+    PORT=$port ACCOUNT_ID=$account_id AUTH_DIR="auth_info_$account_id" \
+        RECEIPT_WEBHOOK_URL="${RECEIPT_WEBHOOK_URL:-http://localhost:8000/receipts}" \
+        node whatsapp-bridge-server.js &
     
     echo "✅ Bridge für Account $account_id gestartet (PID: $!)"
 }
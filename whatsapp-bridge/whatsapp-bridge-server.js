@@ -1,20 +1,304 @@
 const express = require('express');
 const { makeWASocket, DisconnectReason, useMultiFileAuthState } = require('@whiskeysockets/baileys');
 const qrcode = require('qrcode-terminal');
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const { Transform } = require('stream');
+const { pipeline } = require('stream/promises');
 
 const app = express();
 app.use(express.json());
 
 let sock;
-let isConnected = false;
+
+// Verbindungszustände: connecting -> open -> reconnecting -> open ...
+// qr (wartet auf Scan) und logged_out nehmen keine Sendungen an
+let connectionState = 'connecting';
+let connectedSince = null;
+let reconnectAttempts = 0;
+let nextReconnectAt = null;
+const RECONNECT_BASE_MS = parseInt(process.env.RECONNECT_BASE_MS || '1000', 10);
+const RECONNECT_MAX_MS = parseInt(process.env.RECONNECT_MAX_MS || '60000', 10);
+
+// Sendungen, die während eines kurzen Reconnects auf 'open' warten
+const SEND_BUFFER_MAX = parseInt(process.env.SEND_BUFFER_MAX || '1000', 10);
+const SEND_BUFFER_TIMEOUT_MS = parseInt(process.env.SEND_BUFFER_TIMEOUT_MS || '15000', 10);
+const sendBuffer = [];
+
+// Content-adressierter Media-Cache: Dateien liegen unter ihrem SHA-256-Hash
+const MEDIA_CACHE_DIR = process.env.MEDIA_CACHE_DIR || './data/media_cache';
+const MEDIA_CACHE_MAX = parseInt(process.env.MEDIA_CACHE_MAX || '10000', 10);
+// Upload-Ergebnisse (direct paths) verfallen auf WhatsApp-Seite -> nur begrenzt wiederverwenden
+const MEDIA_UPLOAD_TTL_MS = parseInt(process.env.MEDIA_UPLOAD_TTL_MS || String(24 * 3600 * 1000), 10);
+// Dateien auf der Platte: Löschen nach Alter (letzte Nutzung) und bei Überschreiten der Gesamtgröße
+const MEDIA_CACHE_TTL_MS = parseInt(process.env.MEDIA_CACHE_TTL_MS || String(7 * 24 * 3600 * 1000), 10);
+const MEDIA_CACHE_MAX_BYTES = parseInt(process.env.MEDIA_CACHE_MAX_BYTES || String(10 * 1024 ** 3), 10);
+const MEDIA_CACHE_SWEEP_MS = parseInt(process.env.MEDIA_CACHE_SWEEP_MS || String(3600 * 1000), 10);
+const MEDIA_DEFAULT_MIMETYPES = {
+    image: 'image/jpeg',
+    video: 'video/mp4',
+    audio: 'audio/mpeg',
+    voice: 'audio/ogg; codecs=opus',
+    document: 'application/octet-stream'
+};
+fs.mkdirSync(MEDIA_CACHE_DIR, { recursive: true });
+
+// Zustellbestätigungen an den MCP Server weiterleiten (gebündelt)
+const ACCOUNT_ID = process.env.ACCOUNT_ID || 'default';
+const RECEIPT_WEBHOOK_URL = process.env.RECEIPT_WEBHOOK_URL;
+const RECEIPT_FLUSH_MS = parseInt(process.env.RECEIPT_FLUSH_MS || '250', 10);
+const RECEIPT_BATCH_MAX = 500;
+let pendingReceipts = [];
+let receiptTimer = null;
+
+function queueReceipt(id, status) {
+    if (!RECEIPT_WEBHOOK_URL) return;
+    pendingReceipts.push({ id, status, timestamp: Date.now() / 1000 });
+    if (pendingReceipts.length >= RECEIPT_BATCH_MAX) {
+        flushReceipts();
+    } else if (!receiptTimer) {
+        receiptTimer = setTimeout(flushReceipts, RECEIPT_FLUSH_MS);
+    }
+}
+
+async function flushReceipts() {
+    clearTimeout(receiptTimer);
+    receiptTimer = null;
+    if (pendingReceipts.length === 0) return;
+    const receipts = pendingReceipts;
+    pendingReceipts = [];
+    try {
+        await fetch(RECEIPT_WEBHOOK_URL, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ account_id: ACCOUNT_ID, receipts })
+        });
+    } catch (error) {
+        console.error('Receipts konnten nicht weitergeleitet werden:', error.message);
+    }
+}
+
+// Baileys legt hier die Upload-Ergebnisse ab (Schlüssel: Typ + Dateipfad = Hash),
+// damit ein Anhang für beliebig viele Empfänger nur einmal hochgeladen wird
+const uploadCache = new Map();
+const mediaCache = {
+    get: (key) => {
+        const entry = uploadCache.get(key);
+        if (!entry) return undefined;
+        if (entry.expiresAt <= Date.now()) {
+            uploadCache.delete(key);
+            return undefined;
+        }
+        return entry.value;
+    },
+    set: (key, value) => {
+        uploadCache.delete(key);
+        if (uploadCache.size >= MEDIA_CACHE_MAX) {
+            uploadCache.delete(uploadCache.keys().next().value);
+        }
+        uploadCache.set(key, { value, expiresAt: Date.now() + MEDIA_UPLOAD_TTL_MS });
+        return true;
+    }
+};
+
+function mediaPath(sha256) {
+    return path.join(MEDIA_CACHE_DIR, sha256);
+}
+
+// Entfernt Dateien, die länger als MEDIA_CACHE_TTL_MS nicht genutzt wurden,
+// und danach die ältesten, bis MEDIA_CACHE_MAX_BYTES eingehalten ist
+async function sweepMediaCache() {
+    const now = Date.now();
+    const files = [];
+    for (const name of await fs.promises.readdir(MEDIA_CACHE_DIR)) {
+        const filePath = path.join(MEDIA_CACHE_DIR, name);
+        try {
+            const stat = await fs.promises.stat(filePath);
+            if (stat.isFile()) files.push({ filePath, size: stat.size, usedAt: stat.mtimeMs });
+        } catch (error) {
+            // zwischenzeitlich gelöscht
+        }
+    }
+    files.sort((a, b) => a.usedAt - b.usedAt);
+    let total = files.reduce((sum, file) => sum + file.size, 0);
+    for (const file of files) {
+        const expired = now - file.usedAt >= MEDIA_CACHE_TTL_MS;
+        if (!expired && total <= MEDIA_CACHE_MAX_BYTES) break;
+        // Laufende Uploads nur entfernen, wenn sie liegen geblieben sind
+        if (!expired && path.basename(file.filePath).startsWith('.upload-')) continue;
+        await fs.promises.rm(file.filePath, { force: true });
+        total -= file.size;
+    }
+}
+
+setInterval(() => {
+    sweepMediaCache().catch((error) => console.error('Media-Cache konnte nicht aufgeräumt werden:', error.message));
+}, MEDIA_CACHE_SWEEP_MS).unref();
+
+// Streamt den Request-Body auf die Platte und berechnet dabei den Hash
+async function storeMedia(req, expectedSha256) {
+    const tmpPath = path.join(MEDIA_CACHE_DIR, `.upload-${crypto.randomUUID()}`);
+    const hash = crypto.createHash('sha256');
+    let size = 0;
+    const hasher = new Transform({
+        transform(chunk, encoding, callback) {
+            hash.update(chunk);
+            size += chunk.length;
+            callback(null, chunk);
+        }
+    });
+
+    try {
+        await pipeline(req, hasher, fs.createWriteStream(tmpPath));
+        const sha256 = hash.digest('hex');
+        if (size === 0) {
+            throw expectedSha256
+                ? httpError(404, 'Medium nicht im Cache, Datei muss mitgesendet werden')
+                : httpError(400, 'Leerer Body, Datei fehlt');
+        }
+        if (expectedSha256 && expectedSha256 !== sha256) {
+            throw httpError(400, 'SHA-256 stimmt nicht mit dem Inhalt überein');
+        }
+        await fs.promises.rename(tmpPath, mediaPath(sha256));
+        return { sha256, size, cached: false };
+    } catch (error) {
+        await fs.promises.rm(tmpPath, { force: true });
+        throw error;
+    }
+}
+
+// Mimetype: Query-Parameter, sonst Content-Type des Requests (außer dem
+// generischen application/octet-stream), sonst Standard des Medientyps
+function mediaMimetype(req, kind) {
+    if (req.query.mimetype) return String(req.query.mimetype);
+    const contentType = (req.headers['content-type'] || '').trim();
+    if (contentType && !contentType.toLowerCase().startsWith('application/octet-stream')) {
+        return contentType;
+    }
+    return MEDIA_DEFAULT_MIMETYPES[kind];
+}
+
+function buildMediaContent(kind, filePath, { caption, filename, mimetype }) {
+    const content = {
+        [kind === 'voice' ? 'audio' : kind]: { url: filePath },
+        mimetype: mimetype || MEDIA_DEFAULT_MIMETYPES[kind]
+    };
+    if (kind === 'voice') content.ptt = true;
+    if (caption && kind !== 'audio' && kind !== 'voice') content.caption = caption;
+    if (kind === 'document') content.fileName = filename || 'datei';
+    return content;
+}
+
+const LOOKUP_BATCH_SIZE = parseInt(process.env.LOOKUP_BATCH_SIZE || '50', 10);
+const LOOKUP_MAX = 5000;
+
+// Nummern (auch '+49 170 ...') oder fertige JIDs -> JID
+function toJid(to) {
+    return to.includes('@') ? to : `${to.replace(/\D/g, '')}@s.whatsapp.net`;
+}
+
+// onWhatsApp für mehrere Nummern; liefert pro Nummer { number, exists, jid }
+async function lookupNumbers(numbers) {
+    const results = [];
+    for (let i = 0; i < numbers.length; i += LOOKUP_BATCH_SIZE) {
+        const batch = numbers.slice(i, i + LOOKUP_BATCH_SIZE);
+        const found = (await sock.onWhatsApp(...batch.map(toJid))) || [];
+        const byNumber = new Map(found.filter((r) => r.exists).map((r) => [r.jid.split('@')[0], r.jid]));
+
+        // WhatsApp kann die Nummer umschreiben (z.B. Mobilvorwahlen) - dann fehlt
+        // die Zuordnung zur Anfrage und die betroffenen Nummern werden einzeln geprüft
+        const unmatched = batch.filter((number) => !byNumber.has(number));
+        if (unmatched.length > 0 && found.filter((r) => r.exists).length > batch.length - unmatched.length) {
+            for (const number of unmatched) {
+                const [single] = (await sock.onWhatsApp(toJid(number))) || [];
+                if (single?.exists) byNumber.set(number, single.jid);
+            }
+        }
+
+        for (const number of batch) {
+            results.push({ number, exists: byNumber.has(number), jid: byNumber.get(number) || null });
+        }
+    }
+    return results;
+}
+
+function httpError(status, message) {
+    return Object.assign(new Error(message), { status });
+}
+
+function isReconnecting() {
+    return connectionState === 'connecting' || connectionState === 'reconnecting';
+}
+
+function isAccepting() {
+    return connectionState === 'open' || (isReconnecting() && sendBuffer.length < SEND_BUFFER_MAX);
+}
+
+// Wartet, bis die Verbindung offen ist - während eines Reconnects höchstens SEND_BUFFER_TIMEOUT_MS
+function whenConnected() {
+    if (connectionState === 'open') return Promise.resolve();
+    if (!isReconnecting()) {
+        return Promise.reject(httpError(503, `WhatsApp nicht verbunden (${connectionState})`));
+    }
+    if (sendBuffer.length >= SEND_BUFFER_MAX) {
+        return Promise.reject(httpError(503, 'Sendepuffer voll, WhatsApp-Verbindung wird aufgebaut'));
+    }
+
+    return new Promise((resolve, reject) => {
+        const entry = { resolve, reject };
+        entry.timer = setTimeout(() => {
+            sendBuffer.splice(sendBuffer.indexOf(entry), 1);
+            reject(httpError(503, 'WhatsApp-Verbindung wird noch aufgebaut'));
+        }, SEND_BUFFER_TIMEOUT_MS);
+        sendBuffer.push(entry);
+    });
+}
+
+function releaseSendBuffer(error) {
+    for (const entry of sendBuffer.splice(0)) {
+        clearTimeout(entry.timer);
+        if (error) {
+            entry.reject(error);
+        } else {
+            entry.resolve();
+        }
+    }
+}
+
+function sendError(res, error) {
+    if (error.status === 503) {
+        const waitMs = nextReconnectAt ? nextReconnectAt - Date.now() : 0;
+        res.set('Retry-After', String(Math.max(Math.ceil(waitMs / 1000), 1)));
+    }
+    res.status(error.status || 500).json({ error: error.message, state: connectionState });
+}
+
+// Exponentielles Backoff mit Jitter, zurückgesetzt bei 'open'
+function scheduleReconnect() {
+    const delay = Math.min(RECONNECT_BASE_MS * 2 ** reconnectAttempts, RECONNECT_MAX_MS);
+    const jittered = Math.round(delay / 2 + Math.random() * delay / 2);
+    reconnectAttempts++;
+    nextReconnectAt = Date.now() + jittered;
+    console.log(`Reconnect-Versuch ${reconnectAttempts} in ${jittered} ms`);
+
+    setTimeout(() => {
+        nextReconnectAt = null;
+        connectToWhatsApp().catch((error) => {
+            console.error('Reconnect fehlgeschlagen:', error.message);
+            scheduleReconnect();
+        });
+    }, jittered);
+}
 
 // WhatsApp-Verbindung initialisieren
 async function connectToWhatsApp() {
-    const { state, saveCreds } = await useMultiFileAuthState('./auth_info');
+    const { state, saveCreds } = await useMultiFileAuthState(process.env.AUTH_DIR || './auth_info');
 
     sock = makeWASocket({
         auth: state,
-        printQRInTerminal: true
+        printQRInTerminal: true,
+        mediaCache
     });
 
     sock.ev.on('connection.update', (update) => {
@@ -23,43 +307,132 @@ async function connectToWhatsApp() {
         if (qr) {
             console.log('QR Code:');
             qrcode.generate(qr, { small: true });
+            connectionState = 'qr';
+            releaseSendBuffer(httpError(503, 'WhatsApp wartet auf QR-Code-Scan'));
         }
 
         if (connection === 'close') {
             const shouldReconnect = (lastDisconnect?.error)?.output?.statusCode !== DisconnectReason.loggedOut;
             console.log('Verbindung geschlossen, reconnect:', shouldReconnect);
+            connectedSince = null;
             if (shouldReconnect) {
-                connectToWhatsApp();
+                connectionState = 'reconnecting';
+                scheduleReconnect();
+            } else {
+                connectionState = 'logged_out';
+                releaseSendBuffer(httpError(503, 'WhatsApp abgemeldet'));
             }
         } else if (connection === 'open') {
             console.log('WhatsApp verbunden!');
-            isConnected = true;
+            connectionState = 'open';
+            connectedSince = new Date().toISOString();
+            reconnectAttempts = 0;
+            releaseSendBuffer();
         }
     });
 
     sock.ev.on('creds.update', saveCreds);
+
+    // Status-Updates eigener Nachrichten: 2 = Server-Ack, 3 = zugestellt, 4 = gelesen
+    sock.ev.on('messages.update', (updates) => {
+        for (const { key, update } of updates) {
+            if (key.fromMe && typeof update.status === 'number') {
+                queueReceipt(key.id, update.status);
+            }
+        }
+    });
 }
 
 // API-Endpunkte
 app.post('/send', async (req, res) => {
     const { to, message } = req.body;
 
-    if (!isConnected) {
-        return res.status(500).json({ error: 'WhatsApp nicht verbunden' });
+    try {
+        await whenConnected();
+        const jid = toJid(to);
+        const sent = await sock.sendMessage(jid, { text: message });
+        res.json({ success: true, message: 'Nachricht gesendet', id: sent?.key?.id });
+    } catch (error) {
+        sendError(res, error);
+    }
+});
+
+// Medien senden: Body = Rohdaten der Datei (gestreamt), Metadaten als Query-Parameter
+app.post('/send-media', async (req, res) => {
+    const { to, kind = 'image', caption, filename } = req.query;
+    const sha256 = req.query.sha256 ? String(req.query.sha256).toLowerCase() : undefined;
+
+    if (!to) {
+        req.resume();
+        return res.status(400).json({ error: 'Empfänger (to) fehlt' });
+    }
+    if (!Object.hasOwn(MEDIA_DEFAULT_MIMETYPES, kind)) {
+        req.resume();
+        return res.status(400).json({ error: `Unbekannter Medientyp: ${kind}` });
+    }
+    if (sha256 && !/^[0-9a-f]{64}$/.test(sha256)) {
+        req.resume();
+        return res.status(400).json({ error: 'Ungültiger SHA-256-Hash' });
+    }
+    if (!isAccepting()) {
+        req.resume();
+        return sendError(res, httpError(503, `WhatsApp nicht verbunden (${connectionState})`));
+    }
+
+    try {
+        let media;
+        if (sha256 && fs.existsSync(mediaPath(sha256))) {
+            // Bereits bekannt: Body (falls vorhanden) verwerfen, Nutzung für die Verdrängung vermerken
+            req.resume();
+            const usedAt = new Date();
+            await fs.promises.utimes(mediaPath(sha256), usedAt, usedAt);
+            media = { sha256, size: (await fs.promises.stat(mediaPath(sha256))).size, cached: true };
+        } else if (req.headers['transfer-encoding'] || Number(req.headers['content-length'] || 0) > 0) {
+            media = await storeMedia(req, sha256);
+        } else {
+            return res.status(404).json({ error: 'Medium nicht im Cache, Datei muss mitgesendet werden' });
+        }
+
+        // Upload läuft unabhängig von der Verbindung, der Versand wartet ggf. auf 'open'
+        await whenConnected();
+        const jid = toJid(to);
+        const mimetype = mediaMimetype(req, kind);
+        const content = buildMediaContent(kind, mediaPath(media.sha256), { caption, filename, mimetype });
+        const sent = await sock.sendMessage(jid, content);
+        res.json({ success: true, message: 'Medium gesendet', id: sent?.key?.id, ...media });
+    } catch (error) {
+        sendError(res, error);
+    }
+});
+
+// Batch-Abfrage, welche Nummern bei WhatsApp registriert sind
+app.post('/lookup', async (req, res) => {
+    const numbers = Array.isArray(req.body?.numbers) ? req.body.numbers.map((n) => String(n).replace(/\D/g, '')) : [];
+
+    if (numbers.length === 0 || numbers.length > LOOKUP_MAX) {
+        return res.status(400).json({ error: `1 bis ${LOOKUP_MAX} Nummern erforderlich` });
     }
 
     try {
-        const jid = to.includes('@') ? to : `${to}@s.whatsapp.net`;
-        await sock.sendMessage(jid, { text: message });
-        res.json({ success: true, message: 'Nachricht gesendet' });
+        await whenConnected();
+        res.json({ results: await lookupNumbers(numbers) });
     } catch (error) {
-        res.status(500).json({ error: error.message });
+        sendError(res, error);
     }
 });
 
 app.get('/status', (req, res) => {
     res.json({
-        connected: isConnected,
+        connected: connectionState === 'open',
+        state: connectionState,
+        // ready: sendet sofort; accepting: nimmt Sendungen an (ggf. gepuffert)
+        ready: connectionState === 'open',
+        accepting: isAccepting(),
+        account_id: ACCOUNT_ID,
+        connected_since: connectedSince,
+        reconnect_attempts: reconnectAttempts,
+        next_reconnect_at: nextReconnectAt ? new Date(nextReconnectAt).toISOString() : null,
+        buffered_sends: sendBuffer.length,
         timestamp: new Date().toISOString()
     });
 });
@@ -68,5 +441,9 @@ app.get('/status', (req, res) => {
 const PORT = process.env.PORT || 3000;
 app.listen(PORT, () => {
     console.log(`WhatsApp Bridge Server läuft auf Port ${PORT}`);
-    connectToWhatsApp();
+    connectToWhatsApp().catch((error) => {
+        console.error('Verbindungsaufbau fehlgeschlagen:', error.message);
+        connectionState = 'reconnecting';
+        scheduleReconnect();
+    });
 });
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark für die Sende- und Speicher-Hot-Paths
+Vergleicht pydantic-Modelle + jsonable_encoder mit MessageRecord + FastJSONResponse
+
+Aufruf: python benchmark_messages.py [anzahl_nachrichten]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from main import Message, build_ack
+from message_store import MessageRecord, MessageStore
+
+PHONES = [f"49170{i:07d}" for i in range(1000)]
+BRIDGE_RESPONSE = {"success": True, "message": "Nachricht gesendet"}
+
+
+def send_legacy(i: int) -> bytes:
+    """Bisheriger Pfad: Modell + datetime + vollständiges Echo"""
+    msg = Message(to=PHONES[i % len(PHONES)], message="Ihre Rechnung ist fällig")
+    msg.timestamp = datetime.utcnow()
+    content = {"status": "sent", "message": msg, "bridge_response": BRIDGE_RESPONSE}
+    return json.dumps(jsonable_encoder(content)).encode("utf-8")
+
+
+def send_compact(i: int, minimal: bool) -> bytes:
+    # FastAPI validiert den Request-Body weiterhin über `Message`
+    msg = Message(to=PHONES[i % len(PHONES)], message="Ihre Rechnung ist fällig")
+    record = MessageRecord(msg.to, msg.message)
+    return build_ack("sent", record, minimal, bridge_response=BRIDGE_RESPONSE).body
+
+
+def time_per_message(fn, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def store_bytes(build, count: int) -> float:
+    tracemalloc.start()
+    store = build(count)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del store
+    return size / count
+
+
+def build_legacy_store(count: int) -> list:
+    store = []
+    for i in range(count):
+        # Nummern kommen aus dem Request-Body, also jeweils als neuer String
+        msg = Message(to="".join(PHONES[i % len(PHONES)]), message=f"Nachricht {i}")
+        msg.timestamp = datetime.utcnow()
+        store.append(msg)
+    return store
+
+
+def build_compact_store(count: int) -> MessageStore:
+    store = MessageStore(maxlen=count)
+    for i in range(count):
+        store.append(MessageRecord("".join(PHONES[i % len(PHONES)]), f"Nachricht {i}"))
+    return store
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    legacy = time_per_message(send_legacy, count)
+    compact = time_per_message(lambda i: send_compact(i, False), count)
+    minimal = time_per_message(lambda i: send_compact(i, True), count)
+    print(f"📤 Senden ({count} Nachrichten, µs/Nachricht)")
+    print(f"   pydantic + jsonable_encoder: {legacy:8.2f}")
+    print(f"   MessageRecord (voll):        {compact:8.2f}  ({legacy / compact:.1f}x)")
+    print(f"   MessageRecord (minimal):     {minimal:8.2f}  ({legacy / minimal:.1f}x)")
+
+    legacy_mem = store_bytes(build_legacy_store, count)
+    compact_mem = store_bytes(build_compact_store, count)
+    print(f"💾 Speichern ({count} Nachrichten, Bytes/Nachricht)")
+    print(f"   pydantic Message:            {legacy_mem:8.1f}")
+    print(f"   MessageRecord:               {compact_mem:8.1f}  ({legacy_mem / compact_mem:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Verwaltung mehrerer WhatsApp-Bridges mit Bereitschafts-Status
+Sendungen werden an bereite Bridges geleitet; Bridges im Reconnect
+werden nur genutzt, wenn keine bereite Bridge verfügbar ist
+"""
+
+import asyncio
+import time
+from typing import List, Optional
+
+import httpx
+
+
+class BridgeState:
+    """Zuletzt bekannter Zustand einer Bridge (aus /status)"""
+
+    __slots__ = ("url", "state", "ready", "accepting", "account_id", "checked_at", "error")
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.state = "unknown"
+        self.ready = False
+        self.accepting = False
+        self.account_id = None
+        self.checked_at = 0.0
+        self.error = None
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "ready": self.ready,
+            "accepting": self.accepting,
+            "account_id": self.account_id,
+            "error": self.error,
+        }
+
+
+class BridgePool:
+    """Bridges mit gecachtem Bereitschafts-Status (höchstens alle `status_ttl` Sekunden abgefragt)"""
+
+    def __init__(self, urls: List[str], status_ttl: float = 2.0, status_timeout: float = 2.0):
+        self.bridges = [BridgeState(url) for url in urls]
+        self.status_ttl = status_ttl
+        self.status_timeout = status_timeout
+        self._next = 0
+
+    async def _refresh(self, client: httpx.AsyncClient, bridge: BridgeState) -> Optional[dict]:
+        try:
+            response = await client.get(f"{bridge.url}/status", timeout=self.status_timeout)
+            status = response.json()
+        except Exception as e:
+            bridge.state, bridge.ready, bridge.accepting = "unreachable", False, False
+            bridge.error = str(e)
+            status = None
+        else:
+            # Ältere Bridges melden nur `connected`
+            bridge.ready = bool(status.get("ready", status.get("connected", False)))
+            bridge.accepting = bool(status.get("accepting", bridge.ready))
+            bridge.state = status.get("state", "open" if bridge.ready else "unknown")
+            bridge.account_id = status.get("account_id")
+            bridge.error = None
+        bridge.checked_at = time.time()
+        return status
+
+    async def refresh(self, force: bool = False) -> List[Optional[dict]]:
+        """Aktualisiert veraltete (oder mit `force` alle) Bridge-Zustände parallel"""
+        now = time.time()
+        stale = [b for b in self.bridges if force or now - b.checked_at >= self.status_ttl]
+        if not stale:
+            return []
+        async with httpx.AsyncClient() as client:
+            return await asyncio.gather(*(self._refresh(client, b) for b in stale))
+
+    async def candidates(self) -> List[BridgeState]:
+        """Bridges in Sende-Reihenfolge: bereite (rotierend), dann puffernde"""
+        await self.refresh()
+        start = self._next % len(self.bridges)
+        self._next += 1
+        rotated = self.bridges[start:] + self.bridges[:start]
+        return [b for b in rotated if b.ready] + [b for b in rotated if not b.ready and b.accepting]
+
+    def mark_unavailable(self, bridge: BridgeState, state: str = None, error: str = None):
+        """Bridge bis zur nächsten Statusabfrage überspringen"""
+        bridge.ready = False
+        bridge.accepting = False
+        bridge.state = state or bridge.state
+        bridge.error = error
+        bridge.checked_at = time.time()
@@ -0,0 +1,54 @@
+"""Gemeinsame Test-Konfiguration: main.py ohne Dateien auf der Platte importierbar machen"""
+
+import os
+
+import httpx
+import pytest
+
+os.environ.setdefault("SCHEDULER_PATH", ":memory:")
+os.environ.setdefault("JID_CACHE_PATH", ":memory:")
+os.environ.setdefault("BRIDGE_URLS", "http://bridge-1,http://bridge-2")
+
+
+class MockBridges:
+    """Simulierte Bridges hinter httpx.MockTransport
+
+    Antworten kommen aus `routes[(host, path)]`: eine Response oder eine
+    Funktion (Request -> Response), die auch httpx-Fehler werfen darf.
+    Ohne Eintrag antwortet `/status` mit `status[host]` (Standard: bereit).
+    """
+
+    def __init__(self):
+        self.status = {}
+        self.routes = {}
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        self.requests.append(request)
+        host, path = request.url.host, request.url.path
+        reply = self.routes.get((host, path))
+        if reply is None:
+            if path == "/status":
+                return httpx.Response(200, json=self.status.get(host, {"ready": True, "state": "open"}))
+            return httpx.Response(404, json={"error": "unbekannter Pfad"})
+        return reply(request) if callable(reply) else reply
+
+    def hosts(self, path: str) -> list:
+        """Bridges, die einen Request auf `path` erhalten haben (in Reihenfolge)"""
+        return [r.url.host for r in self.requests if r.url.path == path]
+
+
+@pytest.fixture
+def bridges(monkeypatch) -> MockBridges:
+    mock = MockBridges()
+    transport = httpx.MockTransport(mock.handler)
+    async_client = httpx.AsyncClient
+
+    class MockAsyncClient(async_client):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(httpx, "AsyncClient", MockAsyncClient)
+    return mock
@@ -0,0 +1,95 @@
+"""
+Rufnummern-Normalisierung (E.164) und persistenter JID-Cache
+Speichert die Ergebnisse von onWhatsApp-Abfragen inkl. negativer Treffer,
+damit Sendungen an ungültige Nummern keinen Roundtrip mehr kosten
+"""
+
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_SEPARATORS = re.compile(r"[\s\-./()]")
+
+# '+49 (0) 170 ...': die eingeklammerte nationale 0 nach der Ländervorwahl entfällt
+_TRUNK_ZERO = re.compile(r"^(\+|00)\s*(\d{1,3})[\s\-./]*\(0\)")
+
+# E.164: höchstens 15 Ziffern inkl. Ländervorwahl, keine führende 0
+_E164_DIGITS = re.compile(r"[1-9]\d{6,14}")
+
+
+def normalize_number(raw: str, default_country_code: str = "49") -> str:
+    """Normalisiert eine Rufnummer nach E.164 (nur Ziffern, ohne '+')
+
+    Akzeptiert '+49 170 1234567', '0049-170-1234567' und nationale
+    Schreibweise '0170 1234567' (ergänzt `default_country_code`);
+    '+49 (0) 170 1234567' wird ohne die eingeklammerte 0 übernommen.
+    Wirft ValueError bei ungültigen Nummern.
+    """
+    number = _TRUNK_ZERO.sub(r"\1\2", raw.strip())
+    if "(0)" in number:
+        # An anderer Stelle ist die Bedeutung unklar -> nicht raten
+        raise ValueError(f"Ungültige Telefonnummer: {raw}")
+    number = _SEPARATORS.sub("", number)
+    if number.startswith("+"):
+        number = number[1:]
+    elif number.startswith("00"):
+        number = number[2:]
+    elif number.startswith("0"):
+        number = default_country_code + number[1:]
+    if not _E164_DIGITS.fullmatch(number):
+        raise ValueError(f"Ungültige Telefonnummer: {raw}")
+    return number
+
+
+class JidCache:
+    """Nummer -> JID (oder None = nicht auf WhatsApp) mit TTL, persistiert in SQLite
+
+    Alle Einträge liegen zusätzlich im Speicher, Lookups kosten also keinen
+    Datenbankzugriff; geschrieben wird gebündelt pro Abfrage-Batch.
+    """
+
+    def __init__(self, path: str, ttl: float = 30 * 24 * 3600, negative_ttl: float = 24 * 3600):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: Dict[str, Tuple[Optional[str], float]] = {}  # Nummer -> (JID, Ablaufzeit)
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jids (number TEXT PRIMARY KEY, jid TEXT, expires_at REAL NOT NULL)"
+        )
+        now = time.time()
+        self._db.execute("DELETE FROM jids WHERE expires_at <= ?", (now,))
+        self._db.commit()
+        for number, jid, expires_at in self._db.execute("SELECT number, jid, expires_at FROM jids"):
+            self._entries[number] = (jid, expires_at)
+
+    def get_many(self, numbers: Iterable[str]) -> Tuple[Dict[str, Optional[str]], List[str]]:
+        """Liefert (Treffer, Fehlende); Treffer mit JID None sind negative Einträge"""
+        now = time.time()
+        hits, misses = {}, []
+        for number in numbers:
+            entry = self._entries.get(number)
+            if entry is not None and entry[1] > now:
+                hits[number] = entry[0]
+            else:
+                misses.append(number)
+        return hits, misses
+
+    def put_many(self, results: Dict[str, Optional[str]]):
+        """Speichert Abfrageergebnisse (JID None = nicht auf WhatsApp)"""
+        now = time.time()
+        rows = []
+        for number, jid in results.items():
+            expires_at = now + (self.ttl if jid else self.negative_ttl)
+            self._entries[number] = (jid, expires_at)
+            rows.append((number, jid, expires_at))
+        if rows:
+            self._db.executemany("INSERT OR REPLACE INTO jids (number, jid, expires_at) VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
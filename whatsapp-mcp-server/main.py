@@ -1,67 +1,559 @@
 import asyncio
 import httpx
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List
-from datetime import datetime
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, model_validator
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
 import os
+import time
+
+from bridge_pool import BridgePool, BridgeState
+from jid_cache import JidCache, normalize_number
+from media_index import MediaIndex
+from message_store import MessageRecord, MessageStore
+from receipts import ReceiptTracker
+from scheduler import STATUS_RETRY, ScheduledJob, Scheduler
+from serialization import FastJSONResponse
 
 app = FastAPI()
 
 # Konfiguration
 BRIDGE_ONLINE = os.getenv("BRIDGE_ONLINE", "true").lower() == "true"  # Standard auf true setzen
 BRIDGE_URL = os.getenv("BRIDGE_URL", "http://localhost:3000")
+# Mehrere Bridges kommagetrennt; Sendungen gehen bevorzugt an bereite Bridges
+BRIDGE_URLS = [url.strip() for url in os.getenv("BRIDGE_URLS", BRIDGE_URL).split(",") if url.strip()]
+BRIDGE_STATUS_TTL = float(os.getenv("BRIDGE_STATUS_TTL", "2"))
+ACCOUNT_ID = os.getenv("ACCOUNT_ID", "default")
+RECEIPT_TTL = float(os.getenv("RECEIPT_TTL", str(7 * 24 * 3600)))
+MEDIA_TIMEOUT = float(os.getenv("MEDIA_TIMEOUT", "300"))
+# Wie MEDIA_CACHE_TTL_MS der Bridges: ungenutzte Medien gelten danach als unbekannt
+MEDIA_CACHE_TTL = float(os.getenv("MEDIA_CACHE_TTL", str(7 * 24 * 3600)))
+MEDIA_INDEX_MAX = int(os.getenv("MEDIA_INDEX_MAX", "100000"))
+MESSAGES_MAX = int(os.getenv("MESSAGES_MAX", "10000"))
+# Ländervorwahl für nationale Nummern (0170...)
+DEFAULT_COUNTRY_CODE = os.getenv("DEFAULT_COUNTRY_CODE", "49")
+JID_CACHE_PATH = os.getenv("JID_CACHE_PATH", "./data/jid_cache.sqlite3")
+JID_CACHE_TTL = float(os.getenv("JID_CACHE_TTL", str(30 * 24 * 3600)))
+JID_NEGATIVE_TTL = float(os.getenv("JID_NEGATIVE_TTL", str(24 * 3600)))
+LOOKUP_BATCH_SIZE = int(os.getenv("LOOKUP_BATCH_SIZE", "500"))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "20"))
+SCHEDULER_PATH = os.getenv("SCHEDULER_PATH", "./data/scheduler.sqlite3")
+SCHEDULER_HORIZON = float(os.getenv("SCHEDULER_HORIZON", "600"))
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "500"))
+SCHEDULER_MAX_ATTEMPTS = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "10"))
+SCHEDULER_RETRY_DELAY = float(os.getenv("SCHEDULER_RETRY_DELAY", "30"))
+# Nur {"status": ...} statt der vollständigen Nachricht zurückgeben
+MINIMAL_ACKS = os.getenv("MINIMAL_ACKS", "false").lower() == "true"
+
+# Unterstützte Medientypen (voice = Sprachnachricht / PTT)
+MEDIA_KINDS = ("image", "video", "audio", "voice", "document")
+
+BRIDGES = BridgePool(BRIDGE_URLS, status_ttl=BRIDGE_STATUS_TTL)
 
 # In-Memory Simulation (für Fallback)
-MESSAGES = []
+MESSAGES = MessageStore(maxlen=MESSAGES_MAX)
+
+# SHA-256 -> Metadaten aller Medien, die mindestens eine Bridge im Cache hat
+MEDIA_CACHE = MediaIndex(ttl=MEDIA_CACHE_TTL, max_entries=MEDIA_INDEX_MAX)
+
+# Nachrichten-ID -> Zustellstatus, gespeist von den Receipts der Bridge
+RECEIPTS = ReceiptTracker(ttl=RECEIPT_TTL)
+
+# Nummer -> JID (None = nicht auf WhatsApp), persistent
+JIDS = JidCache(JID_CACHE_PATH, ttl=JID_CACHE_TTL, negative_ttl=JID_NEGATIVE_TTL)
 
 class Message(BaseModel):
     to: str
     message: str
     timestamp: datetime = None
+    send_at: Optional[datetime] = None  # ohne Zeitzone = UTC
+    delay: Optional[float] = None  # Sekunden
+
+    @model_validator(mode="before")
+    @classmethod
+    def reject_media_fields(cls, data):
+        # /send verschickt nur Text - Anhänge würden sonst stillschweigend fehlen
+        if isinstance(data, dict) and ("media_kind" in data or "media_sha256" in data):
+            raise ValueError("Medien bitte über /send_media senden")
+        return data
+
+class BulkMessage(BaseModel):
+    recipients: List[str]
+    message: str
+    send_at: Optional[datetime] = None
+    delay: Optional[float] = None
 
-async def send_to_bridge(phone: str, message: str) -> dict:
-    """Sendet Nachricht über die Bridge"""
+class LookupRequest(BaseModel):
+    numbers: List[str]
+
+class Receipt(BaseModel):
+    id: str
+    status: int
+    timestamp: Optional[float] = None  # Unix-Zeit in Sekunden (Bridge)
+
+class ReceiptBatch(BaseModel):
+    account_id: Optional[str] = None
+    receipts: List[Receipt]
+
+def no_bridge_available() -> HTTPException:
+    states = ", ".join(f"{b.url}: {b.state}" for b in BRIDGES.bridges)
+    return HTTPException(status_code=503, detail=f"Keine WhatsApp-Bridge bereit ({states})")
+
+# Nur hier ist sicher, dass der Request die Bridge nicht erreicht hat
+BRIDGE_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+def bridge_json(response: httpx.Response) -> dict:
+    try:
+        return response.json()
+    except ValueError:
+        return {}
+
+async def post_to_bridge(path: str, payload: dict) -> Tuple[BridgeState, dict, float]:
+    """POST an die erste bereite Bridge; zur nächsten nur bei Verbindungsfehler oder 503
+
+    Jeder andere Fehler (z.B. Read-Timeout) wird nicht wiederholt: die Bridge
+    kann die Sendung gepuffert haben und noch ausliefern, ein zweiter Versand
+    über eine andere Bridge ergäbe ein Duplikat von einem anderen Account.
+    Liefert zusätzlich den Zeitpunkt direkt vor dem POST für die Latenzmessung.
+    """
     async with httpx.AsyncClient() as client:
+        for bridge in await BRIDGES.candidates():
+            sent_at = time.time()
+            try:
+                response = await client.post(f"{bridge.url}{path}", json=payload, timeout=30.0)
+            except BRIDGE_CONNECT_ERRORS as e:
+                BRIDGES.mark_unavailable(bridge, "unreachable", str(e))
+                continue
+            except httpx.HTTPError as e:
+                raise HTTPException(status_code=502, detail=f"Bridge error: {type(e).__name__} {str(e)}")
+            if response.status_code == 503:
+                # Bridge baut Verbindung noch auf, Sendung wurde abgelehnt -> nächste versuchen
+                result = bridge_json(response)
+                BRIDGES.mark_unavailable(bridge, result.get("state"), result.get("error"))
+                continue
+            result = bridge_json(response)
+            if response.status_code != 200:
+                raise HTTPException(status_code=502, detail=f"Bridge error: {result.get('error')}")
+            if not result:
+                raise HTTPException(status_code=502, detail="Bridge error: ungültige Antwort")
+            return bridge, result, sent_at
+    raise no_bridge_available()
+
+async def send_to_bridge(phone: str, message: str) -> Tuple[BridgeState, dict, float]:
+    """Sendet Nachricht über die erste bereite Bridge, bei 503 über die nächste"""
+    return await post_to_bridge("/send", {"to": phone, "message": message})
+
+async def lookup_on_bridge(numbers: List[str]) -> Dict[str, Optional[str]]:
+    """Fragt onWhatsApp für mehrere Nummern in einem Request ab"""
+    _, result, _ = await post_to_bridge("/lookup", {"numbers": numbers})
+    return {r["number"]: r["jid"] if r["exists"] else None for r in result["results"]}
+
+async def resolve_numbers(numbers: List[str], fallback: bool = True) -> Dict[str, Optional[str]]:
+    """Nummer -> JID (None = nicht auf WhatsApp), Cache-Misses gebündelt über die Bridge
+
+    Nicht prüfbare Nummern (Bridge nicht erreichbar) werden mit `fallback`
+    direkt als JID adressiert, sonst fehlen sie im Ergebnis; gecacht wird nur,
+    was die Bridge tatsächlich beantwortet hat.
+    """
+    resolved, misses = JIDS.get_many(dict.fromkeys(numbers))
+    for start in range(0, len(misses), LOOKUP_BATCH_SIZE):
+        batch = misses[start:start + LOOKUP_BATCH_SIZE]
         try:
-            response = await client.post(
-                f"{BRIDGE_URL}/send",
-                json={"to": phone, "message": message},
-                timeout=30.0
-            )
-            return response.json()
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Bridge error: {str(e)}")
+            found = await lookup_on_bridge(batch)
+        except HTTPException:
+            found = {}
+        JIDS.put_many(found)
+        resolved.update(found)
+    if fallback:
+        for number in misses:
+            resolved.setdefault(number, f"{number}@s.whatsapp.net")
+    return resolved
+
+def normalize_recipient(to: str) -> str:
+    """E.164-Nummer ohne '+'; JIDs (z.B. Gruppen) bleiben unverändert"""
+    if "@" in to:
+        return to
+    return normalize_number(to, DEFAULT_COUNTRY_CODE)
+
+async def resolve_recipient(to: str) -> Optional[str]:
+    if "@" in to:
+        return to
+    return (await resolve_numbers([to]))[to]
+
+async def send_text(record: MessageRecord, jid: str) -> dict:
+    """Sendet Text an eine aufgelöste JID und registriert die ID für Receipts"""
+    bridge, result, sent_at = await send_to_bridge(jid, record.message)
+    if result.get("id"):
+        RECEIPTS.track(result["id"], bridge.account_id or ACCOUNT_ID, sent_at)
+    return {"id": result.get("id"), "bridge_response": result}
+
+async def send_records(records: List[MessageRecord]) -> List[dict]:
+    """Sendet viele (normalisierte) Nachrichten parallel, Nummern gebündelt aufgelöst"""
+    jids = await resolve_numbers([r.to for r in records if "@" not in r.to])
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def send_one(record: MessageRecord) -> dict:
+        jid = jids.get(record.to, record.to)
+        if jid is None:
+            return {"to": record.to, "status": "not_on_whatsapp"}
+        async with semaphore:
+            try:
+                sent = await send_text(record, jid)
+                return {"to": record.to, "status": "sent", "id": sent["id"]}
+            except HTTPException as e:
+                return {"to": record.to, "status": "error", "error": e.detail, "code": e.status_code}
+
+    return await asyncio.gather(*(send_one(r) for r in records))
+
+async def send_scheduled(jobs: List[ScheduledJob]) -> List[Tuple[str, Optional[str]]]:
+    """Sendepfad für fällige Jobs des Schedulers"""
+    records = [MessageRecord(job.to, job.message) for job in jobs]
+    if not BRIDGE_ONLINE:
+        for record in records:
+            MESSAGES.append(record)
+        return [("simulated", None)] * len(records)
+    results = await send_records(records)
+    # 503: keine Bridge hat die Nachricht angenommen -> später erneut versuchen
+    return [
+        (STATUS_RETRY if r.get("code") == 503 else r["status"], r.get("id") or r.get("error"))
+        for r in results
+    ]
+
+# Geplante Nachrichten (persistent, Freigabe gebündelt in den Sendepfad)
+SCHEDULER = Scheduler(
+    SCHEDULER_PATH,
+    send_scheduled,
+    horizon=SCHEDULER_HORIZON,
+    batch_size=SCHEDULER_BATCH_SIZE,
+    max_attempts=SCHEDULER_MAX_ATTEMPTS,
+    retry_delay=SCHEDULER_RETRY_DELAY
+)
+
+def due_time(send_at: Optional[datetime], delay: Optional[float]) -> Optional[float]:
+    """Fälligkeit als Unix-Zeit, None für sofortigen Versand"""
+    if send_at is not None and delay is not None:
+        raise HTTPException(status_code=400, detail="Entweder send_at oder delay angeben, nicht beides")
+    if delay is not None:
+        if delay < 0:
+            raise HTTPException(status_code=400, detail="delay darf nicht negativ sein")
+        return time.time() + delay
+    if send_at is not None:
+        if send_at.tzinfo is None:
+            send_at = send_at.replace(tzinfo=timezone.utc)
+        return send_at.timestamp()
+    return None
+
+def send_at_time(due_at: float) -> datetime:
+    """Fälligkeit für Antworten im selben Format wie `send_at` im Request (ISO, UTC)"""
+    return datetime.fromtimestamp(due_at, timezone.utc)
+
+@app.on_event("startup")
+async def start_scheduler():
+    SCHEDULER.start()
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await SCHEDULER.stop()
+
+def build_ack(status: str, record: MessageRecord, minimal: bool, **extra) -> FastJSONResponse:
+    """Antwort für Sende-Endpunkte - minimal nur Status (und ggf. Fehler)"""
+    if minimal:
+        content = {"status": status}
+        for key in ("id", "job_id", "error"):
+            if extra.get(key) is not None:
+                content[key] = extra[key]
+        return FastJSONResponse(content)
+    return FastJSONResponse({"status": status, "message": record.to_dict(), **extra})
 
 @app.post("/send")
-async def send_whatsapp_message(msg: Message):
-    msg.timestamp = datetime.utcnow()
+async def send_whatsapp_message(msg: Message, minimal: bool = MINIMAL_ACKS):
+    due_at = due_time(msg.send_at, msg.delay)
+    try:
+        record = MessageRecord(normalize_recipient(msg.to), msg.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if due_at is not None:
+        job_id = SCHEDULER.schedule(record.to, record.message, due_at)
+        return build_ack("scheduled", record, minimal, job_id=job_id, send_at=send_at_time(due_at))
 
     if BRIDGE_ONLINE:
         # Echter Versand über Bridge
         try:
-            result = await send_to_bridge(msg.to, msg.message)
-            return {"status": "sent", "message": msg, "bridge_response": result}
+            jid = await resolve_recipient(record.to)
+            if jid is None:
+                return build_ack("not_on_whatsapp", record, minimal, error="Nummer ist nicht bei WhatsApp registriert")
+            return build_ack("sent", record, minimal, **await send_text(record, jid))
+        except HTTPException as e:
+            return build_ack("error", record, minimal, error=e.detail)
         except Exception as e:
-            return {"status": "error", "message": msg, "error": str(e)}
+            return build_ack("error", record, minimal, error=str(e))
     else:
         # Simulation
-        MESSAGES.append(msg)
-        return {"status": "simulated", "detail": "Bridge offline, Nachricht simuliert", "message": msg}
+        MESSAGES.append(record)
+        return build_ack("simulated", record, minimal, detail="Bridge offline, Nachricht simuliert")
 
-@app.get("/messages", response_model=List[Message])
+async def request_body(request: Request) -> Optional[AsyncIterator[bytes]]:
+    """Body-Stream des Clients oder None, wenn der Body leer ist
+
+    Liest nur den ersten Chunk vorab, damit ein leerer Body auch bei
+    Chunked-Encoding als leer (b"") weitergegeben werden kann.
+    """
+    chunks = request.stream()
+    async for first in chunks:
+        if first:
+            break
+    else:
+        return None
+
+    async def body() -> AsyncIterator[bytes]:
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return body()
+
+async def send_media_to_bridge(request: Request, params: dict, sha256: str) -> Tuple[BridgeState, httpx.Response, float]:
+    """Streamt den Request-Body ungepuffert an eine bereite Bridge weiter
+
+    Bridges, die das Medium schon kennen, werden bevorzugt und nur per Hash
+    angesprochen; nur dann (oder bei leerem Body) ist ein Wechsel zur
+    nächsten Bridge möglich, weil der Body noch nicht verbraucht ist.
+    """
+    known = MEDIA_CACHE.bridges(sha256)
+    candidates = sorted(await BRIDGES.candidates(), key=lambda b: b.url not in known)
+    body = None
+    if any(bridge.url not in known for bridge in candidates):
+        body = await request_body(request)
+
+    async with httpx.AsyncClient() as client:
+        for bridge in candidates:
+            cached = bridge.url in known or body is None
+            headers = {"content-type": request.headers.get("content-type", "application/octet-stream")}
+            if not cached and "content-length" in request.headers:
+                # Ohne Content-Length würde httpx chunked senden
+                headers["content-length"] = request.headers["content-length"]
+            sent_at = time.time()
+            try:
+                response = await client.post(
+                    f"{bridge.url}/send-media",
+                    params=params,
+                    content=b"" if cached else body,
+                    headers=headers,
+                    timeout=MEDIA_TIMEOUT
+                )
+            except BRIDGE_CONNECT_ERRORS as e:
+                BRIDGES.mark_unavailable(bridge, "unreachable", str(e))
+                if cached:
+                    continue
+                raise HTTPException(status_code=502, detail=f"Bridge error: {str(e)}")
+            except httpx.HTTPError as e:
+                raise HTTPException(status_code=502, detail=f"Bridge error: {type(e).__name__} {str(e)}")
+            if response.status_code == 503:
+                BRIDGES.mark_unavailable(bridge, error="Bridge nicht bereit")
+                if cached:
+                    continue
+            return bridge, response, sent_at
+    raise no_bridge_available()
+
+@app.post("/send_media")
+async def send_whatsapp_media(
+    request: Request,
+    to: str,
+    kind: str = "image",
+    caption: str = None,
+    filename: str = None,
+    mimetype: str = None,
+    sha256: str = None,
+    minimal: bool = MINIMAL_ACKS
+):
+    """Sendet Bild, Video, Dokument oder Sprachnachricht (Body = Rohdaten der Datei)
+
+    Ist `sha256` bereits im Media-Cache, kann der Body leer bleiben - die Datei
+    wird dann nicht erneut übertragen bzw. zu WhatsApp hochgeladen.
+    """
+    if kind not in MEDIA_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unbekannter Medientyp: {kind}")
+    sha256 = sha256.lower() if sha256 else None
+    try:
+        to = normalize_recipient(to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    record = MessageRecord(to, caption or "", media_kind=kind, media_sha256=sha256)
+
+    if not BRIDGE_ONLINE:
+        # Simulation: Body verwerfen, ohne ihn im Speicher zu halten
+        async for _ in request.stream():
+            pass
+        MESSAGES.append(record)
+        return build_ack("simulated", record, minimal, detail="Bridge offline, Nachricht simuliert")
+
+    jid = await resolve_recipient(to)
+    if jid is None:
+        return build_ack("not_on_whatsapp", record, minimal, error="Nummer ist nicht bei WhatsApp registriert")
+
+    params = {"to": jid, "kind": kind}
+    for key, value in (("caption", caption), ("filename", filename), ("mimetype", mimetype), ("sha256", sha256)):
+        if value:
+            params[key] = value
+
+    try:
+        bridge, response, sent_at = await send_media_to_bridge(request, params, sha256)
+        result = response.json()
+    except HTTPException as e:
+        return build_ack("error", record, minimal, error=e.detail)
+    except Exception as e:
+        return build_ack("error", record, minimal, error=str(e))
+
+    if response.status_code != 200:
+        if response.status_code == 404 and sha256:
+            # Bridge kennt den Hash nicht (mehr) - Datei muss erneut mitgeschickt werden
+            MEDIA_CACHE.discard_bridge(sha256, bridge.url)
+        return build_ack("error", record, minimal, error=result.get("error"), bridge_response=result)
+
+    record.media_sha256 = result.get("sha256", sha256)
+    MEDIA_CACHE.add(record.media_sha256, kind, result.get("size"), bridge.url)
+    if result.get("id"):
+        RECEIPTS.track(result["id"], bridge.account_id or ACCOUNT_ID, sent_at)
+    return build_ack("sent", record, minimal, id=result.get("id"), bridge_response=result)
+
+@app.post("/send_bulk")
+async def send_whatsapp_bulk(bulk: BulkMessage, minimal: bool = MINIMAL_ACKS):
+    """Sendet dieselbe Nachricht an viele Empfänger
+
+    Ungültige Nummern und Nummern ohne WhatsApp werden vorab aussortiert,
+    Doppelte nur einmal beliefert.
+    """
+    invalid, numbers = [], []
+    for raw in bulk.recipients:
+        try:
+            numbers.append(normalize_recipient(raw))
+        except ValueError:
+            invalid.append(raw)
+    numbers = list(dict.fromkeys(numbers))
+
+    due_at = due_time(bulk.send_at, bulk.delay)
+    if due_at is not None:
+        # Prüfung auf WhatsApp-Registrierung erfolgt erst bei Fälligkeit
+        job_ids = SCHEDULER.schedule_many([(number, bulk.message, due_at) for number in numbers])
+        content = {"status": "scheduled", "scheduled": len(job_ids), "send_at": send_at_time(due_at), "invalid": invalid}
+        if not minimal:
+            content["job_ids"] = job_ids
+        return FastJSONResponse(content)
+
+    if not BRIDGE_ONLINE:
+        for number in numbers:
+            MESSAGES.append(MessageRecord(number, bulk.message))
+        return FastJSONResponse({"status": "simulated", "simulated": len(numbers), "invalid": invalid})
+
+    results = await send_records([MessageRecord(number, bulk.message) for number in numbers])
+    not_on_whatsapp = [r["to"] for r in results if r["status"] == "not_on_whatsapp"]
+    results = [r for r in results if r["status"] != "not_on_whatsapp"]
+    failed = [r for r in results if r["status"] == "error"]
+    content = {
+        "status": "done",
+        "sent": len(results) - len(failed),
+        "failed": len(failed),
+        "invalid": invalid,
+        "not_on_whatsapp": not_on_whatsapp
+    }
+    if minimal:
+        content["errors"] = failed
+    else:
+        content["results"] = results
+    return FastJSONResponse(content)
+
+@app.get("/scheduled")
+async def get_scheduler_stats():
+    """Anzahl geplanter Nachrichten je Status"""
+    return SCHEDULER.stats()
+
+@app.get("/scheduled/{job_id}")
+async def get_scheduled_message(job_id: int):
+    job = SCHEDULER.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Geplante Nachricht nicht gefunden")
+    return job
+
+@app.delete("/scheduled/{job_id}")
+async def cancel_scheduled_message(job_id: int):
+    """Storniert eine noch nicht versendete Nachricht"""
+    if not SCHEDULER.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Keine ausstehende Nachricht mit dieser ID")
+    return {"id": job_id, "status": "cancelled"}
+
+@app.post("/lookup")
+async def lookup_numbers(lookup: LookupRequest):
+    """Prüft Nummern auf WhatsApp-Registrierung (gecacht)"""
+    numbers = []
+    for raw in lookup.numbers:
+        try:
+            numbers.append((raw, normalize_number(raw, DEFAULT_COUNTRY_CODE)))
+        except ValueError:
+            numbers.append((raw, None))
+    valid = [number for _, number in numbers if number]
+    jids = await resolve_numbers(valid, fallback=False) if BRIDGE_ONLINE and valid else {}
+
+    results = []
+    for raw, number in numbers:
+        if number is None:
+            status = "invalid"
+        elif number not in jids:
+            status = "unchecked"
+        else:
+            status = "on_whatsapp" if jids[number] else "not_on_whatsapp"
+        results.append({"input": raw, "number": number, "jid": jids.get(number), "status": status})
+    return {"results": results}
+
+@app.get("/media/{sha256}")
+async def get_media_cache_entry(sha256: str):
+    """Prüft, ob ein Medium bereits hochgeladen wurde"""
+    entry = MEDIA_CACHE.get(sha256.lower())
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Medium nicht im Cache")
+    return {"sha256": sha256.lower(), **entry}
+
+@app.post("/receipts")
+async def receive_receipts(batch: ReceiptBatch):
+    """Nimmt von der Bridge weitergeleitete Status-Updates (messages.update) entgegen"""
+    matched = 0
+    for receipt in batch.receipts:
+        matched += RECEIPTS.update(receipt.id, receipt.status, receipt.timestamp)
+    return {"received": len(batch.receipts), "matched": matched}
+
+@app.get("/messages/{message_id}/status")
+async def get_message_status(message_id: str):
+    """Zustellstatus einer gesendeten Nachricht"""
+    entry = RECEIPTS.get(message_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Nachricht unbekannt oder abgelaufen")
+    return {"id": message_id, **entry.to_dict()}
+
+@app.get("/latency")
+async def get_latency(account_id: str = None):
+    """Latenz-Histogramme Senden -> Server-Ack -> Zugestellt -> Gelesen"""
+    return {
+        "tracked_messages": len(RECEIPTS),
+        "unknown_receipts": RECEIPTS.unknown_receipts,
+        "accounts": RECEIPTS.latency(account_id)
+    }
+
+@app.get("/messages", response_class=FastJSONResponse)
 async def get_whatsapp_messages(limit: int = 30):
-    return MESSAGES[-limit:]
+    return FastJSONResponse([record.to_dict() for record in MESSAGES.latest(limit)])
 
 @app.get("/bridge_status")
 async def whatsapp_bridge_status():
     if BRIDGE_ONLINE:
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{BRIDGE_URL}/status", timeout=10.0)
-                return {"bridge_online": True, "status": response.json()}
-        except:
-            return {"bridge_online": False, "error": "Bridge nicht erreichbar"}
+        statuses = await BRIDGES.refresh(force=True)
+        bridges = [bridge.to_dict() for bridge in BRIDGES.bridges]
+        if not any(statuses):
+            return {"bridge_online": False, "error": "Bridge nicht erreichbar", "bridges": bridges}
+        return {
+            "bridge_online": any(bridge.ready for bridge in BRIDGES.bridges),
+            "status": statuses[0],
+            "bridges": bridges
+        }
     else:
         return {"bridge_online": False, "simulation_mode": True}
 
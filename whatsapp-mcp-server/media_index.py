@@ -0,0 +1,70 @@
+"""
+Index der bereits an Bridges übertragenen Medien (SHA-256 -> Bridges)
+Begrenzt nach Alter seit der letzten Nutzung und nach Anzahl, analog zum
+Media-Cache der Bridges, der ungenutzte Dateien ebenfalls verwirft
+"""
+
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class MediaIndex:
+    """SHA-256 -> {kind, size, first_seen, last_used, bridges} mit TTL ab letzter Nutzung
+
+    Einträge werden in Nutzungsreihenfolge gehalten; abgelaufene oder
+    überzählige werden daher immer vorne entfernt.
+    """
+
+    def __init__(self, ttl: float = 7 * 24 * 3600, max_entries: int = 100_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    def _evict(self, now: float):
+        entries = self._entries
+        while entries:
+            oldest = next(iter(entries.values()))
+            if oldest["last_used"] + self.ttl > now and len(entries) <= self.max_entries:
+                break
+            entries.popitem(last=False)
+
+    def get(self, sha256: str) -> Optional[dict]:
+        self._evict(time.time())
+        return self._entries.get(sha256)
+
+    def bridges(self, sha256: Optional[str]) -> List[str]:
+        """Bridges, die das Medium (vermutlich) noch vorrätig haben"""
+        entry = self.get(sha256) if sha256 else None
+        return entry["bridges"] if entry else []
+
+    def add(self, sha256: str, kind: str, size: Optional[int], bridge_url: str) -> dict:
+        """Vermerkt eine erfolgreiche Sendung über `bridge_url`"""
+        now = time.time()
+        entry = self._entries.get(sha256)
+        if entry is None:
+            entry = self._entries[sha256] = {
+                "kind": kind,
+                "size": size,
+                "first_seen": now,
+                "last_used": now,
+                "bridges": [],
+            }
+        entry["last_used"] = now
+        self._entries.move_to_end(sha256)
+        if bridge_url not in entry["bridges"]:
+            entry["bridges"].append(bridge_url)
+        self._evict(now)
+        return entry
+
+    def discard_bridge(self, sha256: str, bridge_url: str):
+        """Bridge kennt das Medium nicht (mehr), z.B. nach Verdrängung aus ihrem Cache"""
+        entry = self._entries.get(sha256)
+        if entry is not None and bridge_url in entry["bridges"]:
+            entry["bridges"].remove(bridge_url)
+
+    def __contains__(self, sha256: str) -> bool:
+        return self.get(sha256) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
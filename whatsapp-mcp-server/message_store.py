@@ -0,0 +1,67 @@
+"""
+Kompakte Nachrichten-Speicherung für die Hot Paths (Senden/Speichern)
+Ersetzt pydantic-Modelle und datetime-Objekte durch schlanke Records
+"""
+
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Iterable, List, Optional
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class MessageRecord:
+    """Interne Darstellung einer Nachricht (__slots__, Zeitstempel als float)"""
+
+    __slots__ = ("to", "message", "timestamp", "media_kind", "media_sha256")
+
+    def __init__(
+        self,
+        to: str,
+        message: str,
+        timestamp: float = None,
+        media_kind: Optional[str] = None,
+        media_sha256: Optional[str] = None,
+    ):
+        # Telefonnummern/JIDs wiederholen sich ständig -> internieren
+        self.to = sys.intern(to)
+        self.message = message
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.media_kind = media_kind
+        self.media_sha256 = media_sha256
+
+    def to_dict(self) -> dict:
+        """Gleiche Felder wie das pydantic-Modell `Message` (Zeitstempel naiv in UTC)"""
+        return {
+            "to": self.to,
+            "message": self.message,
+            "timestamp": _EPOCH + timedelta(seconds=self.timestamp),
+            "media_kind": self.media_kind,
+            "media_sha256": self.media_sha256,
+        }
+
+
+class MessageStore:
+    """Begrenzter Ringpuffer für gespeicherte Nachrichten"""
+
+    def __init__(self, maxlen: int = 10000):
+        self._records = deque(maxlen=maxlen)
+
+    def append(self, record: MessageRecord):
+        self._records.append(record)
+
+    def latest(self, limit: int) -> List[MessageRecord]:
+        """Die letzten `limit` Nachrichten in Einfügereihenfolge"""
+        if limit <= 0:
+            return []
+        start = max(len(self._records) - limit, 0)
+        return list(islice(self._records, start, None))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterable[MessageRecord]:
+        return iter(self._records)
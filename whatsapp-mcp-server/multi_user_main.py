@@ -12,14 +12,21 @@ from typing import List, Dict, Optional
 from datetime import datetime
 import os
 import json
+import time
 import hashlib
 
+from receipts import ReceiptTracker
+
 app = FastAPI(title="Multi-User WhatsApp MCP Server")
 
 # Konfiguration
 BRIDGES = {}  # Account-ID -> Bridge-Info
 BRIDGE_BASE_PORT = 3000
 BRIDGE_URL_TEMPLATE = "http://localhost:{port}"
+RECEIPT_TTL = float(os.getenv("RECEIPT_TTL", str(7 * 24 * 3600)))
+
+# Nachrichten-ID -> Zustellstatus aller Accounts
+RECEIPTS = ReceiptTracker(ttl=RECEIPT_TTL)
 
 class Message(BaseModel):
     to: str
@@ -27,6 +34,15 @@ class Message(BaseModel):
     account_id: Optional[str] = None
     timestamp: datetime = None
 
+class Receipt(BaseModel):
+    id: str
+    status: int
+    timestamp: Optional[float] = None  # Unix-Zeit in Sekunden (Bridge)
+
+class ReceiptBatch(BaseModel):
+    account_id: Optional[str] = None
+    receipts: List[Receipt]
+
 class AccountInfo(BaseModel):
     account_id: str
     phone_number: str
@@ -132,20 +148,57 @@ async def send_whatsapp_message(msg: Message, x_account_id: str = Header(None)):
         bridge_url = bridge_manager.get_bridge_url(account_id)
         
         async with httpx.AsyncClient() as client:
+            sent_at = time.time()
             response = await client.post(
                 f"{bridge_url}/send",
                 json={"to": msg.to, "message": msg.message},
                 timeout=30.0
             )
+            result = response.json()
+            if response.status_code == 503:
+                # Bridge im Reconnect/Warm-up - Client soll später erneut senden
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Bridge nicht bereit ({result.get('state')}): {result.get('error')}",
+                    headers={"Retry-After": response.headers.get("retry-after", "5")}
+                )
+            if response.status_code != 200:
+                raise HTTPException(status_code=502, detail=f"Bridge error: {result.get('error')}")
+            if result.get("id"):
+                RECEIPTS.track(result["id"], account_id, sent_at)
             return {
                 "status": "sent",
                 "account_id": account_id,
+                "id": result.get("id"),
                 "message": msg,
-                "bridge_response": response.json()
+                "bridge_response": result
             }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fehler beim Senden: {str(e)}")
 
+@app.post("/receipts")
+async def receive_receipts(batch: ReceiptBatch):
+    """Nimmt von den Bridges weitergeleitete Status-Updates entgegen"""
+    matched = 0
+    for receipt in batch.receipts:
+        matched += RECEIPTS.update(receipt.id, receipt.status, receipt.timestamp)
+    return {"received": len(batch.receipts), "matched": matched}
+
+@app.get("/messages/{message_id}/status")
+async def get_message_status(message_id: str):
+    """Zustellstatus einer gesendeten Nachricht"""
+    entry = RECEIPTS.get(message_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Nachricht unbekannt oder abgelaufen")
+    return {"id": message_id, **entry.to_dict()}
+
+@app.get("/accounts/{account_id}/latency")
+async def get_account_latency(account_id: str):
+    """Latenz-Histogramme Senden -> Server-Ack -> Zugestellt -> Gelesen"""
+    return {"account_id": account_id, **RECEIPTS.latency(account_id).get(account_id, {})}
+
 @app.get("/messages")
 async def get_whatsapp_messages(limit: int = 30, x_account_id: str = Header(None)):
     """Holt Nachrichten von einem spezifischen Account"""
@@ -0,0 +1,196 @@
+"""
+Zustellbestätigungen (Receipts) und Latenz-Tracking
+Ordnet die von der Bridge weitergeleiteten Status-Updates den gesendeten
+Nachrichten-IDs zu und führt Latenz-Histogramme pro Account
+"""
+
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Baileys-Status (proto.WebMessageInfo.Status)
+STATUS_ERROR = 0
+STATUS_PENDING = 1
+STATUS_SERVER_ACK = 2
+STATUS_DELIVERED = 3
+STATUS_READ = 4
+STATUS_PLAYED = 5
+
+STATUS_NAMES = {
+    STATUS_ERROR: "error",
+    STATUS_PENDING: "pending",
+    STATUS_SERVER_ACK: "server_ack",
+    STATUS_DELIVERED: "delivered",
+    STATUS_READ: "read",
+    STATUS_PLAYED: "played",
+}
+
+# Obergrenzen der Histogramm-Buckets in Sekunden (letzter Bucket = +Inf)
+LATENCY_BUCKETS = (
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 86400.0
+)
+
+STAGES = ("server_ack", "delivered", "read")
+
+
+class LatencyHistogram:
+    """Histogramm mit festen Buckets (O(log b) pro Messwert)"""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Obergrenze des Buckets, in dem das Quantil liegt"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+    def _json_quantile(self, q: float):
+        """Quantil für JSON: der Überlauf-Bucket wird wie sein Schlüssel als "+Inf" gemeldet"""
+        value = self.quantile(q)
+        return "+Inf" if value == float("inf") else value
+
+    def to_dict(self) -> dict:
+        buckets = {str(bound): n for bound, n in zip(LATENCY_BUCKETS, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else None,
+            "p50": self._json_quantile(0.5),
+            "p90": self._json_quantile(0.9),
+            "p99": self._json_quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class MessageStatus:
+    """Zustand einer gesendeten Nachricht"""
+
+    __slots__ = ("account_id", "status", "sent_at", "server_ack_at", "delivered_at", "read_at", "expires_at")
+
+    def __init__(self, account_id: str, sent_at: float, expires_at: float):
+        self.account_id = account_id
+        self.status = STATUS_PENDING
+        self.sent_at = sent_at
+        self.server_ack_at = None
+        self.delivered_at = None
+        self.read_at = None
+        self.expires_at = expires_at
+
+    def to_dict(self) -> dict:
+        return {
+            "account_id": self.account_id,
+            "status": STATUS_NAMES.get(self.status, str(self.status)),
+            "sent_at": self.sent_at,
+            "server_ack_at": self.server_ack_at,
+            "delivered_at": self.delivered_at,
+            "read_at": self.read_at,
+        }
+
+
+class ReceiptTracker:
+    """In-Memory-Index Nachrichten-ID -> Status mit TTL-Verdrängung
+
+    Einträge werden in Sende-Reihenfolge gehalten; da alle dieselbe TTL haben,
+    laufen sie in genau dieser Reihenfolge ab und werden vorne entfernt.
+    """
+
+    def __init__(self, ttl: float = 7 * 24 * 3600, max_entries: int = 1_000_000, max_early: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_early = max_early
+        self._entries: "OrderedDict[str, MessageStatus]" = OrderedDict()
+        # Receipts, die vor der Antwort auf /send eintreffen (ID noch unbekannt)
+        self._early: "OrderedDict[str, list]" = OrderedDict()
+        self._histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.unknown_receipts = 0
+
+    def _evict(self, now: float):
+        entries = self._entries
+        while entries:
+            oldest = next(iter(entries.values()))
+            if oldest.expires_at > now and len(entries) <= self.max_entries:
+                break
+            entries.popitem(last=False)
+
+    def _histogram(self, account_id: str, stage: str) -> LatencyHistogram:
+        stages = self._histograms.get(account_id)
+        if stages is None:
+            stages = self._histograms[account_id] = {name: LatencyHistogram() for name in STAGES}
+        return stages[stage]
+
+    def track(self, message_id: str, account_id: str, sent_at: float = None):
+        """Registriert eine an die Bridge übergebene Nachricht"""
+        now = time.time()
+        sent_at = now if sent_at is None else sent_at
+        self._entries[message_id] = MessageStatus(account_id, sent_at, now + self.ttl)
+        self._entries.move_to_end(message_id)
+        self._evict(now)
+        for status, timestamp in self._early.pop(message_id, ()):
+            self.update(message_id, status, timestamp)
+
+    def update(self, message_id: str, status: int, timestamp: float = None) -> bool:
+        """Verarbeitet ein Status-Update; False, wenn die ID unbekannt ist"""
+        now = time.time()
+        self._evict(now)
+        at = now if timestamp is None else timestamp
+        entry = self._entries.get(message_id)
+        if entry is None:
+            self.unknown_receipts += 1
+            self._early.setdefault(message_id, []).append((status, at))
+            if len(self._early) > self.max_early:
+                self._early.popitem(last=False)
+            return False
+
+        if status == STATUS_ERROR:
+            entry.status = STATUS_ERROR
+            return True
+
+        # Stufen einzeln erfassen, auch wenn Updates übersprungen werden
+        # oder in falscher Reihenfolge eintreffen
+        if status >= STATUS_SERVER_ACK and entry.server_ack_at is None:
+            entry.server_ack_at = at
+            self._histogram(entry.account_id, "server_ack").observe(max(at - entry.sent_at, 0.0))
+        if status >= STATUS_DELIVERED and entry.delivered_at is None:
+            entry.delivered_at = at
+            self._histogram(entry.account_id, "delivered").observe(max(at - entry.sent_at, 0.0))
+        if status >= STATUS_READ and entry.read_at is None:
+            entry.read_at = at
+            self._histogram(entry.account_id, "read").observe(max(at - entry.sent_at, 0.0))
+        if status > entry.status:
+            entry.status = status
+        return True
+
+    def get(self, message_id: str) -> Optional[MessageStatus]:
+        self._evict(time.time())
+        return self._entries.get(message_id)
+
+    def latency(self, account_id: str = None) -> dict:
+        """Latenz-Histogramme (Senden -> Stufe) pro Account"""
+        accounts = [account_id] if account_id else list(self._histograms)
+        return {
+            account: {
+                stage: histogram.to_dict()
+                for stage, histogram in self._histograms.get(account, {}).items()
+            }
+            for account in accounts
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
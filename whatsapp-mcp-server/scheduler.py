@@ -0,0 +1,258 @@
+"""
+Zeitgesteuerter Nachrichtenversand
+Alle Jobs liegen persistent in SQLite (Index auf Fälligkeit); im Speicher hält
+ein Heap nur die Jobs, die innerhalb des Horizonts fällig werden. Ein einziger
+Hintergrund-Task gibt fällige Jobs gebündelt an den Sendepfad weiter.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledJob:
+    """Fälliger Job, wie er an den Sendepfad übergeben wird"""
+
+    __slots__ = ("id", "due_at", "to", "message", "attempts")
+
+    def __init__(self, job_id: int, due_at: float, to: str, message: str, attempts: int = 1):
+        self.id = job_id
+        self.due_at = due_at
+        self.to = to
+        self.message = message
+        self.attempts = attempts  # laufender Versuch, ab 1
+
+
+# Vom Sendepfad gemeldet, wenn die Nachricht nicht abgeschickt werden konnte
+# (keine Bridge bereit) und gefahrlos später erneut versucht werden darf
+STATUS_RETRY = "retry"
+
+# Sendepfad: Jobs -> pro Job (Status, Nachrichten-ID oder Fehler)
+SendBatch = Callable[[List[ScheduledJob]], Awaitable[List[Tuple[str, Optional[str]]]]]
+
+
+class Scheduler:
+    """Persistenter Scheduler mit Zeitfenster-Heap
+
+    Einfügen: ein B-Baum-Insert in SQLite plus ggf. heappush, also O(log n).
+    Im Speicher liegen nur (Fälligkeit, ID)-Paare des aktuellen Fensters
+    [jetzt, jetzt + horizon); spätere Jobs werden beim Nachladen übernommen.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        send_batch: SendBatch,
+        horizon: float = 600.0,
+        batch_size: int = 500,
+        max_in_memory: int = 500_000,
+        tick: float = 1.0,
+        retention: float = 7 * 24 * 3600,
+        max_attempts: int = 10,
+        retry_delay: float = 30.0,
+        max_retry_delay: float = 3600.0,
+    ):
+        self.send_batch = send_batch
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.max_in_memory = max_in_memory
+        self.tick = tick
+        self.retention = retention
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._heap: List[Tuple[float, int]] = []
+        self._loaded_until = float("-inf")
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                due_at REAL NOT NULL,
+                recipient TEXT NOT NULL,
+                message TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                result TEXT,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (due_at) WHERE status = 'pending';
+            CREATE INDEX IF NOT EXISTS jobs_done ON jobs (due_at) WHERE status NOT IN ('pending', 'sending');
+            """
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "attempts" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        # Beim Absturz mitten im Versand: erneut senden (at-least-once)
+        self._db.execute("UPDATE jobs SET status = 'pending' WHERE status = 'sending'")
+        self._db.commit()
+
+    def schedule_many(self, jobs: List[Tuple[str, str, float]]) -> List[int]:
+        """Legt Jobs (Empfänger, Text, Fälligkeit als Unix-Zeit) an und liefert ihre IDs"""
+        now = time.time()
+        cursor = self._db.cursor()
+        ids = []
+        for to, message, due_at in jobs:
+            cursor.execute(
+                "INSERT INTO jobs (due_at, recipient, message, created_at) VALUES (?, ?, ?, ?)",
+                (due_at, to, message, now),
+            )
+            ids.append(cursor.lastrowid)
+            if due_at < self._loaded_until:
+                if not self._heap or due_at < self._heap[0][0]:
+                    self._wakeup.set()
+                heapq.heappush(self._heap, (due_at, cursor.lastrowid))
+        self._db.commit()
+        return ids
+
+    def schedule(self, to: str, message: str, due_at: float) -> int:
+        return self.schedule_many([(to, message, due_at)])[0]
+
+    def cancel(self, job_id: int) -> bool:
+        """Storniert einen noch ausstehenden Job (der Heap-Eintrag verfällt beim Pop)"""
+        cursor = self._db.execute(
+            "UPDATE jobs SET status = 'cancelled' WHERE id = ? AND status = 'pending'", (job_id,)
+        )
+        self._db.commit()
+        return cursor.rowcount > 0
+
+    def get(self, job_id: int) -> Optional[dict]:
+        row = self._db.execute(
+            "SELECT id, due_at, recipient, message, status, result, created_at, attempts FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "due_at", "to", "message", "status", "result", "created_at", "attempts")
+        return dict(zip(keys, row))
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+        return {"in_memory": len(self._heap), **counts}
+
+    def _refill(self, now: float):
+        """Übernimmt Jobs aus SQLite, die bis `now + horizon` fällig werden
+
+        Höchstens `max_in_memory` auf einmal; dann endet das Fenster beim
+        letzten geladenen Job. Dabei doppelt geladene Einträge sind harmlos,
+        da beim Entnehmen nur noch ausstehende Jobs berücksichtigt werden.
+        """
+        until = now + self.horizon
+        limit = self.max_in_memory - len(self._heap)
+        if limit <= 0:
+            # Heap voll: Fenster nicht verschieben, sonst würden Jobs übersprungen
+            return
+        rows = self._db.execute(
+            "SELECT due_at, id FROM jobs WHERE status = 'pending' AND due_at >= ? AND due_at < ? "
+            "ORDER BY due_at LIMIT ?",
+            (self._loaded_until, until, limit),
+        ).fetchall()
+        if len(rows) == limit:
+            until = rows[-1][0]
+        if rows:
+            self._heap.extend(rows)
+            heapq.heapify(self._heap)
+        self._loaded_until = until
+        self._db.execute(
+            "DELETE FROM jobs WHERE status NOT IN ('pending', 'sending') AND due_at < ?",
+            (now - self.retention,),
+        )
+        self._db.commit()
+
+    def _pop_due(self, now: float) -> List[ScheduledJob]:
+        """Entnimmt bis zu `batch_size` fällige, noch ausstehende Jobs
+
+        Veraltete Heap-Einträge (storniert, doppelt geladen oder nach einem
+        Retry neu terminiert) werden verworfen, da Status bzw. Fälligkeit in
+        SQLite nicht mehr passen.
+        """
+        rows = []
+        while len(rows) < self.batch_size and self._heap and self._heap[0][0] <= now:
+            ids = set()
+            while self._heap and self._heap[0][0] <= now and len(ids) < self.batch_size - len(rows):
+                ids.add(heapq.heappop(self._heap)[1])
+            placeholders = ",".join("?" * len(ids))
+            found = self._db.execute(
+                f"SELECT id, due_at, recipient, message, attempts + 1 FROM jobs "
+                f"WHERE status = 'pending' AND due_at <= ? AND id IN ({placeholders})",
+                [now, *ids],
+            ).fetchall()
+            # Sofort markieren, damit spätere Duplikate im selben Durchlauf nicht mehr passen
+            self._db.executemany(
+                "UPDATE jobs SET status = 'sending', attempts = attempts + 1 WHERE id = ?",
+                [(row[0],) for row in found],
+            )
+            rows += found
+        self._db.commit()
+        return [ScheduledJob(*row) for row in sorted(rows, key=lambda row: row[1])]
+
+    def _retry_at(self, job: ScheduledJob, now: float) -> Optional[float]:
+        """Nächste Fälligkeit mit exponentiellem Backoff, None nach `max_attempts` Versuchen"""
+        if job.attempts >= self.max_attempts:
+            return None
+        return now + min(self.retry_delay * 2 ** (job.attempts - 1), self.max_retry_delay)
+
+    async def _release(self, jobs: List[ScheduledJob]):
+        try:
+            results = await self.send_batch(jobs)
+        except Exception as e:
+            logger.error(f"Geplanter Versand fehlgeschlagen: {e}")
+            results = [("failed", str(e))] * len(jobs)
+        now = time.time()
+        done, retries = [], []
+        for job, (status, result) in zip(jobs, results):
+            due_at = self._retry_at(job, now) if status == STATUS_RETRY else None
+            if due_at is not None:
+                retries.append((due_at, result, job.id))
+                if due_at < self._loaded_until:
+                    heapq.heappush(self._heap, (due_at, job.id))
+            else:
+                done.append(("error" if status == STATUS_RETRY else status, result, job.id))
+        self._db.executemany("UPDATE jobs SET status = ?, result = ? WHERE id = ?", done)
+        self._db.executemany("UPDATE jobs SET status = 'pending', due_at = ?, result = ? WHERE id = ?", retries)
+        self._db.commit()
+
+    async def run(self):
+        """Hauptschleife: nachladen, fällige Jobs gebündelt senden, schlafen"""
+        while True:
+            now = time.time()
+            if now + self.horizon / 2 >= self._loaded_until and len(self._heap) < self.max_in_memory // 2:
+                self._refill(now)
+
+            jobs = self._pop_due(now)
+            if jobs:
+                await self._release(jobs)
+                continue
+
+            timeout = self.tick
+            if self._heap:
+                timeout = min(max(self._heap[0][0] - now, 0.0), self.tick)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,161 @@
+"""Tests für BridgePool und das Routing von main.post_to_bridge"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import main
+from bridge_pool import BridgePool
+
+URLS = ["http://bridge-1", "http://bridge-2"]
+
+
+@pytest.fixture
+def pool(monkeypatch) -> BridgePool:
+    pool = BridgePool(URLS)
+    monkeypatch.setattr(main, "BRIDGES", pool)
+    return pool
+
+
+def candidate_hosts(pool: BridgePool) -> list:
+    return [b.url for b in asyncio.run(pool.candidates())]
+
+
+def post() -> tuple:
+    return asyncio.run(main.post_to_bridge("/send", {"to": "491701234567@s.whatsapp.net", "message": "Hallo"}))
+
+
+def sent_ok(request):
+    return httpx.Response(200, json={"success": True, "id": f"ID-{request.url.host}"})
+
+
+def refuse(request):
+    raise httpx.ConnectError("Connection refused", request=request)
+
+
+def test_ready_bridges_come_before_buffering_ones(bridges, pool):
+    bridges.status["bridge-1"] = {"ready": False, "accepting": True, "state": "reconnecting"}
+    bridges.status["bridge-2"] = {"ready": True, "state": "open"}
+
+    assert candidate_hosts(pool) == ["http://bridge-2", "http://bridge-1"]
+
+
+def test_bridges_that_do_not_accept_are_skipped(bridges, pool):
+    bridges.status["bridge-1"] = {"ready": False, "accepting": False, "state": "qr"}
+
+    assert candidate_hosts(pool) == ["http://bridge-2"]
+
+
+def test_ready_bridges_are_rotated(bridges, pool):
+    assert candidate_hosts(pool) == URLS
+    assert candidate_hosts(pool) == URLS[::-1]
+    assert candidate_hosts(pool) == URLS
+
+
+def test_status_is_cached_for_status_ttl(bridges, pool):
+    candidate_hosts(pool)
+    candidate_hosts(pool)
+
+    assert bridges.hosts("/status") == ["bridge-1", "bridge-2"]
+
+
+def test_legacy_status_and_unreachable_bridge(bridges, pool):
+    bridges.status["bridge-1"] = {"connected": True}
+    bridges.routes[("bridge-2", "/status")] = refuse
+
+    asyncio.run(pool.refresh(force=True))
+
+    assert pool.bridges[0].ready and pool.bridges[0].state == "open"
+    assert pool.bridges[1].state == "unreachable" and not pool.bridges[1].accepting
+
+
+def test_connect_error_fails_over_and_marks_bridge_unavailable(bridges, pool):
+    bridges.routes[("bridge-1", "/send")] = refuse
+    bridges.routes[("bridge-2", "/send")] = sent_ok
+
+    bridge, result, _ = post()
+
+    assert (bridge.url, result["id"]) == ("http://bridge-2", "ID-bridge-2")
+    assert pool.bridges[0].state == "unreachable" and not pool.bridges[0].ready
+    assert candidate_hosts(pool) == ["http://bridge-2"]
+
+
+def test_connect_timeout_fails_over(bridges, pool):
+    def timeout(request):
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    bridges.routes[("bridge-1", "/send")] = timeout
+    bridges.routes[("bridge-2", "/send")] = sent_ok
+
+    assert post()[0].url == "http://bridge-2"
+
+
+def test_503_fails_over_and_takes_state_from_body(bridges, pool):
+    bridges.routes[("bridge-1", "/send")] = httpx.Response(503, json={"state": "reconnecting", "error": "nicht bereit"})
+    bridges.routes[("bridge-2", "/send")] = sent_ok
+
+    assert post()[0].url == "http://bridge-2"
+    assert (pool.bridges[0].state, pool.bridges[0].error) == ("reconnecting", "nicht bereit")
+    assert bridges.hosts("/send") == ["bridge-1", "bridge-2"]
+
+
+def test_read_timeout_is_not_resent_through_another_bridge(bridges, pool):
+    def slow(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    bridges.routes[("bridge-1", "/send")] = slow
+    bridges.routes[("bridge-2", "/send")] = sent_ok
+
+    with pytest.raises(HTTPException) as error:
+        post()
+
+    assert error.value.status_code == 502
+    assert bridges.hosts("/send") == ["bridge-1"]
+    assert pool.bridges[0].ready
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        httpx.Response(500, json={"error": "kaputt"}),
+        httpx.Response(200, text="<html>"),
+        httpx.Response(502, text="Bad Gateway"),
+    ],
+)
+def test_other_errors_are_not_resent(bridges, pool, response):
+    bridges.routes[("bridge-1", "/send")] = response
+    bridges.routes[("bridge-2", "/send")] = sent_ok
+
+    with pytest.raises(HTTPException) as error:
+        post()
+
+    assert error.value.status_code == 502
+    assert bridges.hosts("/send") == ["bridge-1"]
+
+
+def test_no_bridge_available(bridges, pool):
+    for host in ("bridge-1", "bridge-2"):
+        bridges.routes[(host, "/send")] = httpx.Response(503, json={"state": "connecting"})
+
+    with pytest.raises(HTTPException) as error:
+        post()
+
+    assert error.value.status_code == 503
+    assert bridges.hosts("/send") == ["bridge-1", "bridge-2"]
+
+
+def test_lookup_uses_the_same_failover(bridges, pool):
+    bridges.routes[("bridge-1", "/lookup")] = refuse
+    bridges.routes[("bridge-2", "/lookup")] = httpx.Response(
+        200,
+        json={"results": [
+            {"number": "491701234567", "exists": True, "jid": "491701234567@s.whatsapp.net"},
+            {"number": "491709999999", "exists": False, "jid": None},
+        ]},
+    )
+
+    result = asyncio.run(main.lookup_on_bridge(["491701234567", "491709999999"]))
+
+    assert result == {"491701234567": "491701234567@s.whatsapp.net", "491709999999": None}
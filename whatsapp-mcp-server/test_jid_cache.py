@@ -0,0 +1,91 @@
+"""Tests für normalize_number und JidCache"""
+
+import time
+
+import pytest
+
+from jid_cache import JidCache, normalize_number
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("+49 170 1234567", "491701234567"),
+        ("0049-170-1234567", "491701234567"),
+        ("0170/1234567", "491701234567"),
+        ("  +1 (415) 555-0100 ", "14155550100"),
+        ("+49 (0) 170 1234567", "491701234567"),
+        ("+49(0)170 1234567", "491701234567"),
+        ("0049 (0)30 1234567", "49301234567"),
+    ],
+)
+def test_normalize_number(raw, expected):
+    assert normalize_number(raw) == expected
+
+
+def test_normalize_number_national_uses_default_country_code():
+    assert normalize_number("0664 1234567", default_country_code="43") == "436641234567"
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "+49 123",                  # zu kurz
+        "+49 1701 2345 6789 0123",  # mehr als 15 Ziffern
+        "+49 170 CALL NOW",         # Buchstaben
+        "",
+        "+0 170 1234567",           # Ländervorwahl mit führender 0
+        "+49 170 (0) 1234567",      # (0) nicht direkt nach der Ländervorwahl
+    ],
+)
+def test_normalize_number_rejects_invalid(raw):
+    with pytest.raises(ValueError):
+        normalize_number(raw)
+
+
+def test_get_many_splits_hits_and_misses():
+    cache = JidCache(":memory:")
+    cache.put_many({"491701234567": "491701234567@s.whatsapp.net", "491709999999": None})
+
+    hits, misses = cache.get_many(["491701234567", "491709999999", "491700000000"])
+
+    assert hits == {"491701234567": "491701234567@s.whatsapp.net", "491709999999": None}
+    assert misses == ["491700000000"]
+
+
+def test_negative_entries_expire_after_negative_ttl():
+    cache = JidCache(":memory:", ttl=60, negative_ttl=0.05)
+    cache.put_many({"491701234567": "491701234567@s.whatsapp.net", "491709999999": None})
+
+    time.sleep(0.1)
+    hits, misses = cache.get_many(["491701234567", "491709999999"])
+
+    assert hits == {"491701234567": "491701234567@s.whatsapp.net"}
+    assert misses == ["491709999999"]
+
+
+def test_entries_are_reloaded_from_sqlite(tmp_path):
+    path = str(tmp_path / "jids.sqlite")
+    cache = JidCache(path, ttl=60, negative_ttl=60)
+    cache.put_many({"491701234567": "491701234567@s.whatsapp.net", "491709999999": None})
+    cache._db.close()
+
+    reloaded = JidCache(path)
+
+    assert len(reloaded) == 2
+    hits, misses = reloaded.get_many(["491701234567", "491709999999"])
+    assert hits == {"491701234567": "491701234567@s.whatsapp.net", "491709999999": None}
+    assert misses == []
+
+
+def test_expired_entries_are_dropped_on_reload(tmp_path):
+    path = str(tmp_path / "jids.sqlite")
+    cache = JidCache(path, ttl=60, negative_ttl=0.05)
+    cache.put_many({"491701234567": "491701234567@s.whatsapp.net", "491709999999": None})
+    cache._db.close()
+
+    time.sleep(0.1)
+    reloaded = JidCache(path)
+
+    assert len(reloaded) == 1
+    assert reloaded._db.execute("SELECT COUNT(*) FROM jids").fetchone()[0] == 1
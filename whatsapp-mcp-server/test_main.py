@@ -0,0 +1,46 @@
+"""Tests für die HTTP-Endpunkte des MCP Servers"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "BRIDGE_ONLINE", False)
+    return TestClient(main.app)
+
+
+def test_send_rejects_invalid_number(client):
+    response = client.post("/send", json={"to": "+49 123", "message": "Hallo"})
+
+    assert response.status_code == 400
+    assert "Ungültige Telefonnummer" in response.json()["detail"]
+
+
+def test_send_media_rejects_invalid_number(client):
+    response = client.post("/send_media", params={"to": "+49 123", "kind": "image"}, content=b"x")
+
+    assert response.status_code == 400
+    assert "Ungültige Telefonnummer" in response.json()["detail"]
+
+
+def test_scheduled_ack_returns_send_at_as_iso_time(client):
+    response = client.post(
+        "/send", json={"to": "+49 170 1234567", "message": "Hallo", "send_at": "2030-01-31T09:00:00"}
+    )
+
+    body = response.json()
+    assert body["status"] == "scheduled"
+    assert body["send_at"] == "2030-01-31T09:00:00+00:00"
+    assert main.SCHEDULER.cancel(body["job_id"])
+
+
+def test_scheduled_bulk_ack_returns_send_at_as_iso_time(client):
+    response = client.post(
+        "/send_bulk",
+        json={"recipients": ["+49 170 1234567"], "message": "Hallo", "send_at": "2030-01-31T09:00:00+01:00"},
+    )
+
+    assert response.json()["send_at"] == "2030-01-31T08:00:00+00:00"
@@ -0,0 +1,54 @@
+"""Tests für den Medien-Index"""
+
+import time
+
+from media_index import MediaIndex
+
+HASH_A = "a" * 64
+HASH_B = "b" * 64
+
+
+def test_add_collects_bridges_per_hash():
+    index = MediaIndex()
+    index.add(HASH_A, "image", 10, "http://bridge-1")
+    index.add(HASH_A, "image", 10, "http://bridge-2")
+    index.add(HASH_A, "image", 10, "http://bridge-1")
+
+    assert index.bridges(HASH_A) == ["http://bridge-1", "http://bridge-2"]
+    assert index.bridges(HASH_B) == []
+    assert index.bridges(None) == []
+
+
+def test_discard_bridge():
+    index = MediaIndex()
+    index.add(HASH_A, "image", 10, "http://bridge-1")
+
+    index.discard_bridge(HASH_A, "http://bridge-1")
+    index.discard_bridge(HASH_B, "http://bridge-1")
+
+    assert index.bridges(HASH_A) == []
+
+
+def test_entries_expire_after_last_use():
+    index = MediaIndex(ttl=0.1)
+    index.add(HASH_A, "image", 10, "http://bridge-1")
+    index.add(HASH_B, "image", 10, "http://bridge-1")
+
+    time.sleep(0.06)
+    index.add(HASH_A, "image", 10, "http://bridge-1")
+    time.sleep(0.06)
+
+    assert HASH_A in index
+    assert HASH_B not in index
+    assert len(index) == 1
+
+
+def test_max_entries_evicts_least_recently_used():
+    index = MediaIndex(max_entries=2)
+    index.add(HASH_A, "image", 10, "http://bridge-1")
+    index.add(HASH_B, "image", 10, "http://bridge-1")
+    index.add(HASH_A, "image", 10, "http://bridge-1")
+    index.add("c" * 64, "image", 10, "http://bridge-1")
+
+    assert HASH_A in index
+    assert HASH_B not in index
@@ -0,0 +1,128 @@
+"""Tests für ReceiptTracker und LatencyHistogram"""
+
+import json
+import time
+
+from receipts import (
+    STATUS_DELIVERED,
+    STATUS_ERROR,
+    STATUS_READ,
+    STATUS_SERVER_ACK,
+    LatencyHistogram,
+    ReceiptTracker,
+)
+
+
+def test_update_records_stage_timestamps_and_histograms():
+    tracker = ReceiptTracker()
+    tracker.track("M1", "acc", sent_at=100.0)
+
+    assert tracker.update("M1", STATUS_SERVER_ACK, 100.3)
+    assert tracker.update("M1", STATUS_DELIVERED, 102.0)
+
+    entry = tracker.get("M1")
+    assert entry.server_ack_at == 100.3
+    assert entry.delivered_at == 102.0
+    assert entry.read_at is None
+    latency = tracker.latency("acc")["acc"]
+    assert latency["server_ack"]["count"] == 1
+    assert latency["delivered"]["count"] == 1
+    assert latency["read"]["count"] == 0
+
+
+def test_skipped_stages_are_filled_from_later_status():
+    tracker = ReceiptTracker()
+    tracker.track("M1", "acc", sent_at=100.0)
+
+    tracker.update("M1", STATUS_READ, 105.0)
+
+    entry = tracker.get("M1")
+    assert entry.status == STATUS_READ
+    assert entry.server_ack_at == entry.delivered_at == entry.read_at == 105.0
+
+
+def test_out_of_order_updates_do_not_downgrade_or_double_count():
+    tracker = ReceiptTracker()
+    tracker.track("M1", "acc", sent_at=100.0)
+
+    tracker.update("M1", STATUS_READ, 105.0)
+    tracker.update("M1", STATUS_SERVER_ACK, 101.0)
+
+    entry = tracker.get("M1")
+    assert entry.status == STATUS_READ
+    assert entry.server_ack_at == 105.0
+    assert tracker.latency("acc")["acc"]["server_ack"]["count"] == 1
+
+
+def test_error_status_is_kept():
+    tracker = ReceiptTracker()
+    tracker.track("M1", "acc", sent_at=100.0)
+
+    tracker.update("M1", STATUS_ERROR, 101.0)
+
+    assert tracker.get("M1").to_dict()["status"] == "error"
+
+
+def test_early_receipts_are_replayed_on_track():
+    tracker = ReceiptTracker()
+
+    assert not tracker.update("M1", STATUS_SERVER_ACK, 100.2)
+    assert tracker.unknown_receipts == 1
+    tracker.track("M1", "acc", sent_at=100.0)
+
+    entry = tracker.get("M1")
+    assert entry.status == STATUS_SERVER_ACK
+    assert entry.server_ack_at == 100.2
+
+
+def test_early_receipts_are_bounded():
+    tracker = ReceiptTracker(max_early=2)
+    for message_id in ("A", "B", "C"):
+        tracker.update(message_id, STATUS_SERVER_ACK, 100.0)
+
+    tracker.track("A", "acc", sent_at=99.0)
+
+    assert tracker.get("A").server_ack_at is None
+
+
+def test_entries_expire_after_ttl():
+    tracker = ReceiptTracker(ttl=0.05)
+    tracker.track("M1", "acc")
+
+    time.sleep(0.1)
+    tracker.track("M2", "acc")
+
+    assert tracker.get("M1") is None
+    assert tracker.get("M2") is not None
+    assert len(tracker) == 1
+
+
+def test_max_entries_evicts_oldest():
+    tracker = ReceiptTracker(max_entries=2)
+    for message_id in ("A", "B", "C"):
+        tracker.track(message_id, "acc")
+
+    assert tracker.get("A") is None
+    assert len(tracker) == 2
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for seconds in (0.01, 0.2, 0.2, 3.0):
+        histogram.observe(seconds)
+
+    assert histogram.quantile(0.5) == 0.25
+    assert histogram.quantile(1.0) == 5.0
+    assert histogram.to_dict()["count"] == 4
+
+
+def test_overflow_quantile_is_json_compliant():
+    tracker = ReceiptTracker()
+    tracker.track("M1", "acc", sent_at=100.0)
+    tracker.update("M1", STATUS_READ, 100.0 + 2 * 86400)
+
+    read = tracker.latency("acc")["acc"]["read"]
+    json.dumps(tracker.latency(), allow_nan=False)
+
+    assert read["p99"] == "+Inf"
+    assert read["buckets"]["+Inf"] == 1
@@ -0,0 +1,185 @@
+"""Tests für den persistenten Scheduler"""
+
+import asyncio
+import heapq
+import sqlite3
+import time
+
+from scheduler import STATUS_RETRY, Scheduler
+
+
+class FakeSender:
+    """Sendepfad, der Jobs mitschreibt und feste Ergebnisse liefert"""
+
+    def __init__(self, status: str = "sent"):
+        self.status = status
+        self.sent = []
+
+    async def __call__(self, jobs):
+        self.sent.extend(job.id for job in jobs)
+        return [(self.status, f"M{job.id}") for job in jobs]
+
+
+def drain(scheduler: Scheduler, now: float, rounds: int = 10):
+    """Nachladen und Freigeben wie in `run`, ohne zu schlafen"""
+
+    async def cycle():
+        for _ in range(rounds):
+            scheduler._refill(now)
+            jobs = scheduler._pop_due(now)
+            if not jobs:
+                return
+            await scheduler._release(jobs)
+
+    asyncio.run(cycle())
+
+
+def test_job_inside_loaded_window_goes_onto_heap():
+    now = time.time()
+    scheduler = Scheduler(":memory:", FakeSender(), horizon=600)
+    scheduler._refill(now)
+
+    job_id = scheduler.schedule("491701234567", "Hallo", now + 60)
+
+    assert scheduler._heap == [(now + 60, job_id)]
+    assert scheduler._wakeup.is_set()
+
+
+def test_job_beyond_loaded_window_is_loaded_later():
+    now = time.time()
+    scheduler = Scheduler(":memory:", FakeSender(), horizon=600)
+    scheduler._refill(now)
+
+    job_id = scheduler.schedule("491701234567", "Hallo", now + 3600)
+    assert scheduler._heap == []
+
+    scheduler._refill(now + 3500)
+    assert scheduler._heap == [(now + 3600, job_id)]
+
+
+def test_refill_limit_with_many_jobs_at_same_due_at():
+    now = time.time()
+    sender = FakeSender()
+    scheduler = Scheduler(":memory:", sender, max_in_memory=3, batch_size=10)
+    ids = scheduler.schedule_many([("491701234567", f"Nachricht {i}", now - 1) for i in range(5)])
+
+    scheduler._refill(now)
+    assert len(scheduler._heap) == 3
+    assert scheduler._loaded_until == now - 1
+
+    drain(scheduler, now)
+
+    assert sorted(sender.sent) == ids
+    assert all(scheduler.get(job_id)["status"] == "sent" for job_id in ids)
+
+
+def test_sending_jobs_are_pending_again_after_restart(tmp_path):
+    path = str(tmp_path / "scheduler.sqlite")
+    now = time.time()
+    scheduler = Scheduler(path, FakeSender())
+    job_id = scheduler.schedule("491701234567", "Hallo", now - 1)
+    scheduler._refill(now)
+    assert [job.id for job in scheduler._pop_due(now)] == [job_id]
+    assert scheduler.get(job_id)["status"] == "sending"
+    scheduler._db.close()
+
+    sender = FakeSender()
+    restarted = Scheduler(path, sender)
+    assert restarted.get(job_id)["status"] == "pending"
+
+    drain(restarted, now)
+    assert sender.sent == [job_id]
+    assert restarted.get(job_id)["attempts"] == 2
+
+
+def test_cancelled_job_is_not_sent():
+    now = time.time()
+    sender = FakeSender()
+    scheduler = Scheduler(":memory:", sender)
+    scheduler._refill(now)
+    job_id = scheduler.schedule("491701234567", "Hallo", now - 1)
+
+    assert scheduler.cancel(job_id)
+    assert not scheduler.cancel(job_id)
+    drain(scheduler, now)
+
+    assert sender.sent == []
+    assert scheduler.get(job_id)["status"] == "cancelled"
+
+
+def test_retry_reschedules_with_backoff_until_max_attempts():
+    now = time.time()
+    sender = FakeSender(STATUS_RETRY)
+    scheduler = Scheduler(":memory:", sender, max_attempts=3, retry_delay=10)
+    job_id = scheduler.schedule("491701234567", "Hallo", now - 1)
+
+    drain(scheduler, now)
+    job = scheduler.get(job_id)
+    assert (job["status"], job["attempts"]) == ("pending", 1)
+    assert now + 10 <= job["due_at"] < time.time() + 10
+    assert scheduler._heap == [(job["due_at"], job_id)]
+
+    drain(scheduler, job["due_at"])
+    second = scheduler.get(job_id)
+    assert (second["status"], second["attempts"]) == ("pending", 2)
+    assert now + 20 <= second["due_at"] < time.time() + 20
+
+    drain(scheduler, second["due_at"])
+    assert scheduler.get(job_id)["status"] == "error"
+    assert sender.sent == [job_id] * 3
+
+
+def test_duplicate_heap_entry_does_not_skip_retry_backoff():
+    now = time.time()
+    sender = FakeSender(STATUS_RETRY)
+    scheduler = Scheduler(":memory:", sender, max_in_memory=2, batch_size=1, retry_delay=300)
+    ids = scheduler.schedule_many([("491701234567", f"Nachricht {i}", now - 1) for i in range(3)])
+
+    drain(scheduler, now)
+
+    assert sorted(sender.sent) == ids
+    assert all(scheduler.get(job_id)["attempts"] == 1 for job_id in ids)
+    assert all(scheduler.get(job_id)["status"] == "pending" for job_id in ids)
+
+
+def test_stale_heap_entries_do_not_shrink_the_batch():
+    now = time.time()
+    sender = FakeSender()
+    scheduler = Scheduler(":memory:", sender, batch_size=2)
+    scheduler._refill(now)
+    ids = scheduler.schedule_many([("491701234567", f"Nachricht {i}", now - 1) for i in range(3)])
+    scheduler.cancel(ids[0])
+    heapq.heappush(scheduler._heap, (now - 1, ids[1]))
+
+    jobs = scheduler._pop_due(now)
+
+    assert sorted(job.id for job in jobs) == ids[1:]
+    assert all(job.attempts == 1 for job in jobs)
+    assert [scheduler.get(job_id)["attempts"] for job_id in ids] == [0, 1, 1]
+
+
+def test_final_results_are_not_retried():
+    now = time.time()
+    scheduler = Scheduler(":memory:", FakeSender("not_on_whatsapp"))
+    job_id = scheduler.schedule("491701234567", "Hallo", now - 1)
+
+    drain(scheduler, now)
+
+    assert scheduler.get(job_id)["status"] == "not_on_whatsapp"
+    assert scheduler._heap == []
+
+
+def test_existing_database_gets_attempts_column(tmp_path):
+    path = str(tmp_path / "scheduler.sqlite")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY, due_at REAL NOT NULL, recipient TEXT NOT NULL, "
+        "message TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', result TEXT, created_at REAL NOT NULL)"
+    )
+    db.execute("INSERT INTO jobs (due_at, recipient, message, created_at) VALUES (1, '491701234567', 'Hallo', 0)")
+    db.commit()
+    db.close()
+
+    scheduler = Scheduler(path, FakeSender())
+
+    assert scheduler.get(1)["attempts"] == 0
@@ -0,0 +1,117 @@
+"""Tests für /send_media: Weiterleitung des Bodys und Bevorzugung von Bridges mit Cache"""
+
+import hashlib
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from bridge_pool import BridgePool
+from media_index import MediaIndex
+
+JID = "491701234567@s.whatsapp.net"
+DATA = b"\x89PNG" + b"x" * 1000
+DATA_HASH = hashlib.sha256(DATA).hexdigest()
+
+
+def bridge_send_media(known=()):
+    """/send-media wie die Bridge: Hash aus dem Body, leerer Body nur für bekannte Hashes"""
+
+    def handler(request):
+        body = request.content
+        sha256 = request.url.params.get("sha256")
+        if not body:
+            if sha256 not in known:
+                return httpx.Response(404, json={"error": "Medium nicht im Cache"})
+            return httpx.Response(200, json={"success": True, "id": "M1", "sha256": sha256, "size": 1, "cached": True})
+        return httpx.Response(200, json={
+            "success": True, "id": "M1", "sha256": hashlib.sha256(body).hexdigest(), "size": len(body)
+        })
+
+    return handler
+
+
+@pytest.fixture
+def client(bridges, monkeypatch):
+    monkeypatch.setattr(main, "BRIDGE_ONLINE", True)
+    monkeypatch.setattr(main, "BRIDGES", BridgePool(["http://bridge-1", "http://bridge-2"]))
+    monkeypatch.setattr(main, "MEDIA_CACHE", MediaIndex())
+    return TestClient(main.app)
+
+
+def forwarded(bridges):
+    return [r for r in bridges.requests if r.url.path == "/send-media"]
+
+
+def test_body_is_forwarded_with_content_length(bridges, client):
+    bridges.routes[("bridge-1", "/send-media")] = bridge_send_media()
+
+    response = client.post("/send_media", params={"to": JID, "kind": "image"}, content=DATA)
+
+    assert response.json()["status"] == "sent"
+    [request] = forwarded(bridges)
+    assert request.content == DATA
+    assert request.headers["content-length"] == str(len(DATA))
+    assert "transfer-encoding" not in request.headers
+    assert main.MEDIA_CACHE.bridges(DATA_HASH) == ["http://bridge-1"]
+
+
+def test_chunked_body_is_forwarded_completely(bridges, client):
+    bridges.routes[("bridge-1", "/send-media")] = bridge_send_media()
+
+    response = client.post(
+        "/send_media", params={"to": JID, "kind": "image"}, content=iter([DATA[:10], b"", DATA[10:]])
+    )
+
+    assert response.json()["status"] == "sent"
+    assert forwarded(bridges)[0].content == DATA
+
+
+def test_empty_chunked_body_is_sent_as_empty_body(bridges, client):
+    bridges.routes[("bridge-1", "/send-media")] = bridge_send_media()
+
+    response = client.post(
+        "/send_media", params={"to": JID, "kind": "image", "sha256": DATA_HASH}, content=iter([b""])
+    )
+
+    assert response.json()["status"] == "error"
+    request = forwarded(bridges)[0]
+    assert request.content == b""
+    assert request.headers["content-length"] == "0"
+    assert "transfer-encoding" not in request.headers
+
+
+def test_bridge_with_cached_media_is_preferred(bridges, client):
+    main.MEDIA_CACHE.add(DATA_HASH, "image", len(DATA), "http://bridge-2")
+    bridges.routes[("bridge-1", "/send-media")] = bridge_send_media()
+    bridges.routes[("bridge-2", "/send-media")] = bridge_send_media(known=(DATA_HASH,))
+
+    response = client.post("/send_media", params={"to": JID, "kind": "image", "sha256": DATA_HASH}, content=DATA)
+
+    assert response.json()["status"] == "sent"
+    assert bridges.hosts("/send-media") == ["bridge-2"]
+    assert forwarded(bridges)[0].content == b""
+
+
+def test_upload_to_other_bridge_when_cached_bridge_is_unavailable(bridges, client):
+    main.MEDIA_CACHE.add(DATA_HASH, "image", len(DATA), "http://bridge-2")
+    bridges.routes[("bridge-1", "/send-media")] = bridge_send_media()
+    bridges.routes[("bridge-2", "/send-media")] = httpx.Response(503, json={"state": "reconnecting"})
+
+    response = client.post("/send_media", params={"to": JID, "kind": "image", "sha256": DATA_HASH}, content=DATA)
+
+    assert response.json()["status"] == "sent"
+    assert bridges.hosts("/send-media") == ["bridge-2", "bridge-1"]
+    assert forwarded(bridges)[1].content == DATA
+    assert main.MEDIA_CACHE.bridges(DATA_HASH) == ["http://bridge-2", "http://bridge-1"]
+
+
+def test_bridge_that_lost_the_media_is_forgotten(bridges, client):
+    main.MEDIA_CACHE.add(DATA_HASH, "image", len(DATA), "http://bridge-2")
+    bridges.routes[("bridge-2", "/send-media")] = bridge_send_media()
+
+    response = client.post("/send_media", params={"to": JID, "kind": "image", "sha256": DATA_HASH})
+
+    assert response.json()["status"] == "error"
+    assert main.MEDIA_CACHE.bridges(DATA_HASH) == []